@@ -1,27 +1,73 @@
 """Student evaluation application using Streamlit and OpenAI."""
 
 import asyncio
+import io
+import multiprocessing
 import os
+import tempfile
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import BinaryIO
 from dotenv import load_dotenv
-import streamlit as st
 from openai import AsyncOpenAI
+import streamlit as st
 
 # Load environment variables from .env file
 load_dotenv()
 
-from src.parsers import extract_student_submissions, parse_document, fetch_multiple_urls, parse_urls_from_text
+from src.parsers import (
+    fetch_multiple_urls,
+    get_supported_extensions,
+    iter_submissions,
+    parse_document,
+    parse_urls_from_text,
+)
 from src.evaluation import (
-    evaluate_all_students_async,
-    evaluate_all_students_free_format_async,
+    create_async_client,
+    evaluate_all_students_stream,
+    evaluate_all_students_free_format_stream,
+    submit_evaluation_batch_async,
+    retrieve_evaluation_batch_async,
+    evaluation_cache_keys,
+    load_cached_evaluations,
+    store_evaluations,
+    fit_context_to_budget,
+    fit_submissions_to_budget,
     EvaluationResult,
+    ResponseCache,
 )
 from src.export import (
+    ExcelReportBuilder,
     create_combined_export_excel,
     create_combined_export_word,
     create_combined_export_free_format,
 )
 
+# Upper bound of the "Évaluations parallèles" slider
+MAX_CONCURRENT = 1000
+
+# Radio options, built once rather than on every script rerun
+STUDENT_INPUT_MODES = {
+    "zip": "📦 ZIP (plusieurs étudiants)",
+    "files": "📄 Fichier(s) (travail unique)",
+    "text": "✏️ Texte (travail unique)",
+}
+STUDENT_INPUT_MODE_KEYS = tuple(STUDENT_INPUT_MODES)
+
+OUTPUT_FORMATS = {
+    "excel": "Excel (un fichier, une sheet par étudiant)",
+    "word_structured": "Word structuré (un document par étudiant, sections par critère)",
+    "word_free": "Word libre (format personnalisé)",
+}
+OUTPUT_FORMAT_KEYS = tuple(OUTPUT_FORMATS)
+
+EXECUTION_MODES = {
+    "realtime": "Temps réel",
+    "batch": "Batch OpenAI (24h, -50% de coût)",
+}
+EXECUTION_MODE_KEYS = tuple(EXECUTION_MODES)
+
 # Page configuration
 st.set_page_config(
     page_title="Évaluation des travaux étudiants",
@@ -33,14 +79,52 @@ st.title("📚 Évaluation des travaux étudiants")
 st.markdown("---")
 
 
+@st.cache_data(show_spinner=False)
 def load_default_system_prompt() -> str:
-    """Load the default system prompt from file."""
+    """Load the default system prompt from file, cached across reruns."""
     prompt_path = Path(__file__).parent / "prompts" / "system_prompt.txt"
     if prompt_path.exists():
         return prompt_path.read_text(encoding="utf-8")
     return ""
 
 
+# Formats whose parsing is CPU-bound and holds the GIL, parsed in worker processes
+CPU_BOUND_EXTENSIONS = (".pdf", ".docx", ".xlsx", ".xls")
+
+# Formats read from student ZIP files, the others are skipped unread
+SUPPORTED_EXTENSIONS = tuple(get_supported_extensions())
+
+
+@st.cache_resource
+def get_parser_pool() -> ProcessPoolExecutor:
+    """Get or create the process pool used for CPU-bound parsing and exports."""
+    # spawn rather than fork: the Streamlit server process is multithreaded
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def _parse_file_cached(name: str, content: bytes | BinaryIO) -> str | None:
+    """Parse a document, reusing the result across reruns for identical content.
+
+    PDF, Word and Excel contents extracted from the ZIP are parsed in the
+    process pool; the calling thread only waits for the result, so concurrent
+    callers use every core. Uploaded file objects are parsed in place, since
+    sending them to a worker process would mean copying them.
+    """
+    if isinstance(content, bytes) and name.lower().endswith(CPU_BOUND_EXTENSIONS):
+        return get_parser_pool().submit(parse_document, name, content).result()
+    return parse_document(name, content)
+
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def _fetch_urls_cached(urls: tuple[str, ...]) -> list[tuple[str, str]]:
+    """Fetch URL contents, cached for an hour since pages may change."""
+    return fetch_multiple_urls(list(urls))
+
+
 def parse_uploaded_files(files: list) -> str:
     """Parse and concatenate content from multiple uploaded files."""
     if not files:
@@ -48,29 +132,192 @@ def parse_uploaded_files(files: list) -> str:
 
     contents = []
     for file in files:
-        content = file.read()
-        file.seek(0)  # Reset file pointer for potential re-read
-
-        parsed = parse_document(file.name, content)
+        parsed = _parse_file_cached(file.name, file)
         if parsed:
             contents.append(f"=== {file.name} ===\n{parsed}")
 
     return "\n\n".join(contents)
 
 
-# Initialize async OpenAI client
+# Below this much readable text a submission is most likely a failed parse
+# (scanned PDF, empty document) and not worth an API call
+MIN_SUBMISSION_CHARS = 200
+MIN_READABLE_RATIO = 0.05
+
+
+def submission_skip_reason(work: str | None) -> str | None:
+    """Return why a parsed submission should not be evaluated, or None if usable."""
+    if not work:
+        return "Aucun fichier lisible"
+
+    # Ignore the "=== filename ===" headers added when concatenating files
+    text = "\n".join(
+        line for line in work.splitlines()
+        if not (line.startswith("=== ") and line.endswith(" ==="))
+    ).strip()
+
+    if len(text) < MIN_SUBMISSION_CHARS:
+        return f"Contenu trop court ({len(text)} caractères)"
+
+    readable = sum(1 for ch in text if ch.isprintable() and not ch.isspace())
+    if readable < MIN_READABLE_RATIO * len(text):
+        return "Contenu illisible (espaces ou caractères de contrôle)"
+
+    return None
+
+
+async def extract_and_parse_students(zip_file) -> dict[str, str | None]:
+    """Unzip student submissions in a worker thread and parse each file as soon
+    as it is extracted, so parsing overlaps with decompression."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def produce():
+        try:
+            for student_name, filename, read in iter_submissions(zip_file):
+                # Unsupported files are not decompressed, but still list
+                # their student (reported as having no readable file)
+                content = read() if filename.lower().endswith(SUPPORTED_EXTENSIONS) else None
+                loop.call_soon_threadsafe(queue.put_nowait, (student_name, filename, content))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    producer = asyncio.create_task(asyncio.to_thread(produce))
+
+    parsing_by_student: dict[str, list[tuple[str, asyncio.Task]]] = {}
+    while (item := await queue.get()) is not None:
+        student_name, filename, content = item
+        files = parsing_by_student.setdefault(student_name, [])
+        if content is not None:
+            parsing = asyncio.create_task(asyncio.to_thread(_parse_file_cached, filename, content))
+            files.append((filename, parsing))
+
+    # Re-raise extraction errors (e.g. invalid ZIP)
+    await producer
+
+    student_works = {}
+    for student_name, files in parsing_by_student.items():
+        student_work_parts = []
+        for filename, parsing in files:
+            parsed = await parsing
+            if parsed:
+                student_work_parts.append(f"=== {filename} ===\n{parsed}")
+        student_works[student_name] = "\n\n".join(student_work_parts) if student_work_parts else None
+
+    return student_works
+
+
+async def consume_evaluation_stream(stream, on_result: callable) -> list[tuple[str, object]]:
+    """Collect (student_name, result) pairs, handing each to on_result as it arrives."""
+    results = []
+    async for student_name, result in stream:
+        on_result(student_name, result)
+        results.append((student_name, result))
+    return results
+
+
+def render_evaluation_details(evaluation: EvaluationResult) -> None:
+    """Show one student's structured evaluation in an expander."""
+    with st.expander(f"{evaluation.student_name} - {evaluation.note_finale}/{evaluation.note_max}"):
+        st.markdown("**Feedback général:**")
+        st.write(evaluation.feedback_general)
+
+        st.markdown("**Critères:**")
+        criteria_data = [
+            {
+                "Critère": c.nom,
+                "Note": f"{c.note}/{c.note_max}",
+                "Commentaire": c.commentaire,
+            }
+            for c in evaluation.criteres
+        ]
+        st.dataframe(criteria_data)
+
+
+def render_structured_results(
+    evaluations: list[EvaluationResult],
+    output_format: str,
+    show_details: bool = True,
+    excel_report: io.BytesIO | None = None,
+) -> None:
+    """Show download button, summary and per-student details for structured evaluations.
+
+    excel_report is the Excel report when it was already built while the
+    evaluations were streamed.
+    """
+    st.success(f"✅ {len(evaluations)} étudiants évalués avec succès!")
+
+    # Generate combined report based on output format (main format + markdown txt)
+    if output_format == "excel":
+        with st.spinner("Génération des documents..."):
+            zip_buffer = create_combined_export_excel(evaluations, excel_report)
+
+        st.download_button(
+            label="📥 Télécharger (ZIP: Excel + Markdown)",
+            data=zip_buffer,
+            file_name="evaluations_etudiants.zip",
+            mime="application/zip",
+            type="primary",
+        )
+
+    elif output_format == "word_structured":
+        with st.spinner("Génération des documents..."):
+            zip_buffer = create_combined_export_word(
+                evaluations, executor=get_parser_pool()
+            )
+
+        st.download_button(
+            label="📥 Télécharger (ZIP: Word + Markdown)",
+            data=zip_buffer,
+            file_name="evaluations_etudiants.zip",
+            mime="application/zip",
+            type="primary",
+        )
+
+    # Show summary
+    st.markdown("### 📊 Résumé des évaluations")
+    summary_data = [
+        {
+            "Étudiant": e.student_name,
+            "Note": f"{e.note_finale} / {e.note_max}",
+        }
+        for e in evaluations
+    ]
+    st.dataframe(summary_data)
+
+    # Expandable details for each student
+    if show_details:
+        st.markdown("### 📝 Détails par étudiant")
+        for evaluation in evaluations:
+            render_evaluation_details(evaluation)
+
+
+def run_with_client(work: Callable[[AsyncOpenAI], Awaitable]):
+    """Run work(client) in a new event loop, with an API client opened for it.
+
+    Each asyncio.run() starts a new event loop, and an httpx connection pool
+    cannot be used once the loop it was created in is closed: the client is
+    opened and closed within the same run. Its pool is sized for the highest
+    "Évaluations parallèles" value.
+    """
+    async def run():
+        async with create_async_client(
+            api_key=os.getenv("OPENAI_API_KEY"), max_concurrent=MAX_CONCURRENT
+        ) as client:
+            return await work(client)
+
+    return asyncio.run(run())
+
+
 @st.cache_resource
-def get_async_openai_client():
-    """Get or create async OpenAI client."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
-    return AsyncOpenAI(api_key=api_key)
+def get_response_cache() -> ResponseCache:
+    """Get or create the on-disk cache of evaluation responses."""
+    return ResponseCache(Path(tempfile.gettempdir()) / "projet-phil" / "evaluations")
 
 
-async_client = get_async_openai_client()
+response_cache = get_response_cache()
 
-if not async_client:
+if not os.getenv("OPENAI_API_KEY"):
     st.error(
         "⚠️ Clé API OpenAI non configurée. "
         "Veuillez définir la variable d'environnement `OPENAI_API_KEY`."
@@ -103,16 +350,10 @@ with col2:
     st.subheader("📁 Travaux étudiants")
 
     # Input mode selection
-    STUDENT_INPUT_MODES = {
-        "zip": "📦 ZIP (plusieurs étudiants)",
-        "files": "📄 Fichier(s) (travail unique)",
-        "text": "✏️ Texte (travail unique)",
-    }
-
     student_input_mode = st.radio(
         label="Mode de saisie",
-        options=list(STUDENT_INPUT_MODES.keys()),
-        format_func=lambda x: STUDENT_INPUT_MODES[x],
+        options=STUDENT_INPUT_MODE_KEYS,
+        format_func=STUDENT_INPUT_MODES.get,
         horizontal=True,
         key="student_input_mode",
     )
@@ -194,16 +435,10 @@ st.markdown("---")
 # Output format section
 st.subheader("📤 Format de sortie")
 
-OUTPUT_FORMATS = {
-    "excel": "Excel (un fichier, une sheet par étudiant)",
-    "word_structured": "Word structuré (un document par étudiant, sections par critère)",
-    "word_free": "Word libre (format personnalisé)",
-}
-
 output_format = st.radio(
     label="Choisissez le format de sortie",
-    options=list(OUTPUT_FORMATS.keys()),
-    format_func=lambda x: OUTPUT_FORMATS[x],
+    options=OUTPUT_FORMAT_KEYS,
+    format_func=OUTPUT_FORMATS.get,
     horizontal=True,
 )
 
@@ -242,11 +477,45 @@ with st.expander("⚙️ Paramètres avancés"):
     max_concurrent = st.slider(
         "Évaluations parallèles",
         min_value=1,
-        max_value=1000,
+        max_value=MAX_CONCURRENT,
         value=5,
         help="Nombre d'évaluations simultanées (plus = plus rapide, mais attention aux limites de l'API)",
     )
 
+    rpm_col, tpm_col = st.columns(2)
+    requests_per_minute = rpm_col.number_input(
+        "Limite de requêtes / minute",
+        min_value=1,
+        value=500,
+        step=50,
+        help="Limite RPM de votre compte OpenAI : les appels sont étalés pour ne pas la dépasser",
+    )
+    tokens_per_minute = tpm_col.number_input(
+        "Limite de tokens / minute",
+        min_value=1000,
+        value=2_000_000,
+        step=100_000,
+        help="Limite TPM de votre compte OpenAI (estimée à partir de la taille des prompts)",
+    )
+
+    batch_size = st.slider(
+        "Étudiants par requête",
+        min_value=1,
+        max_value=8,
+        value=1,
+        help="Nombre de travaux évalués dans un même appel à l'API (formats structurés uniquement). "
+        "Regrouper réduit le nombre de requêtes, utile face aux limites de requêtes par minute",
+    )
+
+    execution_mode = st.radio(
+        "Mode d'exécution",
+        options=EXECUTION_MODE_KEYS,
+        format_func=EXECUTION_MODES.get,
+        horizontal=True,
+        help="Le mode batch convient aux grandes cohortes : les résultats arrivent en différé "
+        "(formats structurés uniquement)",
+    )
+
     if st.checkbox("Modifier le prompt système", value=False):
         system_prompt = st.text_area(
             label="Prompt système",
@@ -256,6 +525,17 @@ with st.expander("⚙️ Paramètres avancés"):
     else:
         system_prompt = default_prompt
 
+    use_cache = st.checkbox(
+        "Réutiliser les évaluations en cache",
+        value=True,
+        help="Un étudiant déjà évalué avec exactement les mêmes entrées (travail, grille, "
+        "documents, instructions, modèle) n'est pas renvoyé à l'IA",
+    )
+
+    if st.button("🗑️ Vider le cache des évaluations"):
+        cleared = response_cache.clear()
+        st.success(f"✅ {cleared} évaluation(s) supprimée(s) du cache")
+
 st.markdown("---")
 
 # Evaluation button and results
@@ -268,6 +548,11 @@ if st.button("🚀 Lancer l'évaluation", type="primary", use_container_width=Tr
         st.error("❌ Veuillez fournir une grille d'évaluation (fichier ou texte).")
         st.stop()
 
+    # Batch mode only returns structured evaluations
+    if execution_mode == "batch" and output_format == "word_free":
+        st.error("❌ Le mode batch n'est disponible que pour les formats structurés (Excel, Word structuré).")
+        st.stop()
+
     # For free format, we need output instructions
     if output_format == "word_free" and not output_format_instructions.strip():
         st.error("❌ Veuillez fournir des instructions pour le format de sortie.")
@@ -328,7 +613,7 @@ if st.button("🚀 Lancer l'évaluation", type="primary", use_container_width=Tr
             urls = parse_urls_from_text(knowledge_urls)
             if urls:
                 st.info(f"🌐 Récupération du contenu de {len(urls)} URL(s)...")
-                url_contents = fetch_multiple_urls(urls)
+                url_contents = _fetch_urls_cached(tuple(urls))
                 for url, content in url_contents:
                     knowledge_parts.append(f"=== {url} ===\n{content}")
                 if len(url_contents) < len(urls):
@@ -345,38 +630,38 @@ if st.button("🚀 Lancer l'évaluation", type="primary", use_container_width=Tr
 
     if student_input_mode == "zip":
         # ZIP mode: multiple students
-        with st.spinner("Extraction des travaux étudiants..."):
-            zip_content = student_zip.read()
-            student_submissions = extract_student_submissions(zip_content)
+        # Extract and parse concurrently, reading the upload in place
+        with st.spinner("Extraction et analyse des travaux étudiants..."):
+            student_zip.seek(0)
+            student_works = asyncio.run(extract_and_parse_students(student_zip))
 
-        if not student_submissions:
+        if not student_works:
             st.error("❌ Aucun travail d'étudiant trouvé dans le ZIP.")
             st.stop()
 
-        st.success(f"✅ {len(student_submissions)} étudiants trouvés")
+        st.success(f"✅ {len(student_works)} étudiants trouvés")
 
-        # Parse all student works (fast, synchronous)
-        with st.spinner("Analyse des fichiers étudiants..."):
-            for name, files in student_submissions.items():
-                student_work_parts = []
-                for filename, content in files:
-                    parsed = parse_document(filename, content)
-                    if parsed:
-                        student_work_parts.append(f"=== {filename} ===\n{parsed}")
+        skipped_submissions = []
+        for name, work in student_works.items():
+            skip_reason = submission_skip_reason(work)
+            if skip_reason:
+                skipped_submissions.append({"Étudiant": name, "Raison": skip_reason})
+            else:
+                parsed_submissions[name] = work
 
-                if student_work_parts:
-                    parsed_submissions[name] = "\n\n".join(student_work_parts)
-                else:
-                    st.warning(f"⚠️ Aucun fichier lisible pour {name}")
+        if skipped_submissions:
+            st.warning(
+                f"⚠️ {len(skipped_submissions)} travaux ignorés (non envoyés à l'IA), "
+                "à vérifier avant de relancer :"
+            )
+            st.dataframe(skipped_submissions)
 
     elif student_input_mode == "files":
         # Single student from uploaded files
         with st.spinner("Analyse des fichiers..."):
             student_work_parts = []
             for file in student_single_files:
-                content = file.read()
-                file.seek(0)
-                parsed = parse_document(file.name, content)
+                parsed = _parse_file_cached(file.name, file)
                 if parsed:
                     student_work_parts.append(f"=== {file.name} ===\n{parsed}")
 
@@ -396,6 +681,88 @@ if st.button("🚀 Lancer l'évaluation", type="primary", use_container_width=Tr
         st.error("❌ Aucun travail lisible trouvé.")
         st.stop()
 
+    # Keep every request within the model's context window. Batch API
+    # requests and free-format calls carry a single student.
+    students_per_request = (
+        batch_size if output_format != "word_free" and execution_mode != "batch" else 1
+    )
+    fitted_submissions = fit_submissions_to_budget(
+        model, parsed_submissions, students_per_request
+    )
+    trimmed_students = [
+        name
+        for name, work in fitted_submissions.items()
+        if len(work) < len(parsed_submissions[name])
+    ]
+    if trimmed_students:
+        st.warning(
+            "⚠️ Travaux trop longs pour le modèle, seul leur début est évalué : "
+            + ", ".join(trimmed_students)
+        )
+    parsed_submissions = fitted_submissions
+
+    fitted_grid, fitted_knowledge = fit_context_to_budget(
+        model=model,
+        system_prompt=system_prompt,
+        evaluation_grid=eval_grid_content,
+        knowledge_base=knowledge_content,
+        custom_instructions=custom_instructions,
+        student_works=list(parsed_submissions.values()),
+        output_format_instructions=output_format_instructions,
+        students_per_request=students_per_request,
+    )
+    if len(fitted_grid) < len(eval_grid_content):
+        st.warning("⚠️ La grille d'évaluation dépasse la capacité du modèle et a été tronquée.")
+    if len(fitted_knowledge) < len(knowledge_content):
+        st.warning(
+            "⚠️ La base de connaissances dépasse la capacité du modèle : "
+            f"seuls {len(fitted_knowledge):,} caractères sur {len(knowledge_content):,} sont utilisés."
+        )
+    eval_grid_content, knowledge_content = fitted_grid, fitted_knowledge
+
+    if execution_mode == "batch":
+        # Batch API: submit and return immediately, results are fetched below.
+        # Students already in the cache are not sent, and the batch results
+        # are cached when retrieved.
+        cache_keys = evaluation_cache_keys(
+            student_submissions=parsed_submissions,
+            evaluation_grid=eval_grid_content,
+            knowledge_base=knowledge_content,
+            system_prompt=system_prompt,
+            custom_instructions=custom_instructions,
+            model=model,
+        )
+        cached = load_cached_evaluations(response_cache, cache_keys) if use_cache else {}
+        pending = {
+            name: work for name, work in parsed_submissions.items() if name not in cached
+        }
+
+        batch_id = None
+        if pending:
+            with st.spinner("Envoi du batch à OpenAI..."):
+                batch_id = run_with_client(
+                    lambda client: submit_evaluation_batch_async(
+                        client=client,
+                        student_submissions=pending,
+                        evaluation_grid=eval_grid_content,
+                        knowledge_base=knowledge_content,
+                        system_prompt=system_prompt,
+                        custom_instructions=custom_instructions,
+                        model=model,
+                    )
+                )
+
+        st.session_state.batch_job = {
+            "id": batch_id,
+            "output_format": output_format,
+            "count": len(pending),
+            "students": list(pending),
+            "order": list(parsed_submissions),
+            "cached": cached,
+            "cache_keys": cache_keys,
+        }
+        st.rerun()
+
     # Progress tracking
     progress_bar = st.progress(0)
     status_text = st.empty()
@@ -406,71 +773,56 @@ if st.button("🚀 Lancer l'évaluation", type="primary", use_container_width=Tr
         progress_bar.progress(completed / total)
         status_text.text(f"Évaluation en cours ({completed}/{total}) - Terminé: {student_name}")
 
-    if output_format == "word_free":
-        # Free format evaluation - async parallel processing
-        results = asyncio.run(
-            evaluate_all_students_free_format_async(
-                client=async_client,
-                student_submissions=parsed_submissions,
-                evaluation_grid=eval_grid_content,
-                knowledge_base=knowledge_content,
-                system_prompt=system_prompt,
-                output_format_instructions=output_format_instructions,
-                custom_instructions=custom_instructions,
-                model=model,
-                max_concurrent=max_concurrent,
-                progress_callback=update_progress,
-            )
-        )
-
-        progress_bar.progress(1.0)
-        status_text.text("Évaluation terminée!")
+    # Keep exports in submission order, whatever the completion order
+    submission_order = {name: i for i, name in enumerate(parsed_submissions)}
 
-        # Process results
-        free_evaluations: list[tuple[str, str]] = []
-        for student_name, result in results:
+    if output_format == "word_free":
+        # Free format evaluation - async parallel processing, shown as results arrive
+        summary_area = st.container()
+        st.markdown("### 📝 Aperçu des évaluations")
+        live_preview = st.empty()
+        partial_outputs: dict[str, list[str]] = {}
+
+        def show_partial_output(student_name: str, delta: str | None):
+            if delta is None:
+                # The request is retried: drop the text of the failed attempt
+                partial_outputs.pop(student_name, None)
+                return
+            parts = partial_outputs.setdefault(student_name, [])
+            parts.append(delta)
+            # Follow the oldest evaluation still being written, refreshed every few chunks
+            if student_name == next(iter(partial_outputs)) and len(parts) % 20 == 0:
+                live_preview.markdown(f"**✍️ {student_name}**\n\n{''.join(parts)}")
+
+        def show_free_format_result(student_name: str, result: str | Exception):
+            partial_outputs.pop(student_name, None)
+            live_preview.empty()
             if isinstance(result, Exception):
                 st.error(f"❌ Erreur pour {student_name}: {result}")
             else:
-                free_evaluations.append((student_name, result))
-
-        if free_evaluations:
-            st.success(f"✅ {len(free_evaluations)} étudiants évalués avec succès!")
-
-            # Generate combined ZIP (Word + Markdown txt)
-            with st.spinner("Génération des documents..."):
-                zip_buffer = create_combined_export_free_format(free_evaluations)
-
-            # Download button
-            st.download_button(
-                label="📥 Télécharger (ZIP: Word + Markdown)",
-                data=zip_buffer,
-                file_name="evaluations_etudiants.zip",
-                mime="application/zip",
-                type="primary",
-            )
-
-            # Show preview
-            st.markdown("### 📝 Aperçu des évaluations")
-            for student_name, content in free_evaluations:
                 with st.expander(student_name):
-                    st.markdown(content)
-        else:
-            st.error("❌ Aucune évaluation n'a pu être effectuée.")
-
-    else:
-        # Structured evaluation (Excel or Word structured) - async parallel processing
-        results = asyncio.run(
-            evaluate_all_students_async(
-                client=async_client,
-                student_submissions=parsed_submissions,
-                evaluation_grid=eval_grid_content,
-                knowledge_base=knowledge_content,
-                system_prompt=system_prompt,
-                custom_instructions=custom_instructions,
-                model=model,
-                max_concurrent=max_concurrent,
-                progress_callback=update_progress,
+                    st.markdown(result)
+
+        results = run_with_client(
+            lambda client: consume_evaluation_stream(
+                evaluate_all_students_free_format_stream(
+                    client=client,
+                    student_submissions=parsed_submissions,
+                    evaluation_grid=eval_grid_content,
+                    knowledge_base=knowledge_content,
+                    system_prompt=system_prompt,
+                    output_format_instructions=output_format_instructions,
+                    custom_instructions=custom_instructions,
+                    model=model,
+                    max_concurrent=max_concurrent,
+                    progress_callback=update_progress,
+                    requests_per_minute=requests_per_minute,
+                    tokens_per_minute=tokens_per_minute,
+                    token_callback=show_partial_output,
+                    response_cache=response_cache,
+                    use_cache=use_cache,
+                ),
+                on_result=show_free_format_result,
             )
         )
 
@@ -478,68 +830,157 @@ if st.button("🚀 Lancer l'évaluation", type="primary", use_container_width=Tr
         status_text.text("Évaluation terminée!")
 
         # Process results
-        evaluations: list[EvaluationResult] = []
-        for result in results:
-            if isinstance(result, Exception):
-                st.error(f"❌ Erreur: {result}")
-            else:
-                evaluations.append(result)
+        free_evaluations: list[tuple[str, str]] = [
+            (student_name, result)
+            for student_name, result in sorted(results, key=lambda r: submission_order[r[0]])
+            if not isinstance(result, Exception)
+        ]
 
-        if evaluations:
-            st.success(f"✅ {len(evaluations)} étudiants évalués avec succès!")
+        with summary_area:
+            if free_evaluations:
+                st.success(f"✅ {len(free_evaluations)} étudiants évalués avec succès!")
 
-            # Generate combined report based on output format (main format + markdown txt)
-            if output_format == "excel":
+                # Generate combined ZIP (Word + Markdown txt)
                 with st.spinner("Génération des documents..."):
-                    zip_buffer = create_combined_export_excel(evaluations)
+                    zip_buffer = create_combined_export_free_format(
+                        free_evaluations, executor=get_parser_pool()
+                    )
 
+                # Download button
                 st.download_button(
-                    label="📥 Télécharger (ZIP: Excel + Markdown)",
+                    label="📥 Télécharger (ZIP: Word + Markdown)",
                     data=zip_buffer,
                     file_name="evaluations_etudiants.zip",
                     mime="application/zip",
                     type="primary",
                 )
+            else:
+                st.error("❌ Aucune évaluation n'a pu être effectuée.")
 
-            elif output_format == "word_structured":
-                with st.spinner("Génération des documents..."):
-                    zip_buffer = create_combined_export_word(evaluations)
+    else:
+        # Structured evaluation (Excel or Word structured) - async parallel processing,
+        # shown as results arrive
+        summary_area = st.container()
+        stream_status = st.empty()
+        st.markdown("### 📝 Détails par étudiant")
+        streamed = {"chunks": 0, "chars": 0}
+
+        def show_streaming_progress(student_name: str, delta: str | None):
+            if delta is None:
+                return
+            streamed["chunks"] += 1
+            streamed["chars"] += len(delta)
+            # Refreshed every few chunks, not on each one
+            if streamed["chunks"] % 50 == 0:
+                stream_status.caption(
+                    f"✍️ Réponses en cours de réception : ~{streamed['chars'] // 4} tokens"
+                )
 
-                st.download_button(
-                    label="📥 Télécharger (ZIP: Word + Markdown)",
-                    data=zip_buffer,
-                    file_name="evaluations_etudiants.zip",
-                    mime="application/zip",
-                    type="primary",
+        # Write each Excel sheet as its student completes, overlapping the
+        # workbook build with the API calls still in flight
+        excel_builder = ExcelReportBuilder() if output_format == "excel" else None
+
+        def show_structured_result(student_name: str, result: EvaluationResult | Exception):
+            if isinstance(result, Exception):
+                st.error(f"❌ Erreur pour {student_name}: {result}")
+            else:
+                render_evaluation_details(result)
+                if excel_builder:
+                    excel_builder.add(result)
+
+        results = run_with_client(
+            lambda client: consume_evaluation_stream(
+                evaluate_all_students_stream(
+                    client=client,
+                    student_submissions=parsed_submissions,
+                    evaluation_grid=eval_grid_content,
+                    knowledge_base=knowledge_content,
+                    system_prompt=system_prompt,
+                    custom_instructions=custom_instructions,
+                    model=model,
+                    max_concurrent=max_concurrent,
+                    progress_callback=update_progress,
+                    requests_per_minute=requests_per_minute,
+                    tokens_per_minute=tokens_per_minute,
+                    batch_size=batch_size,
+                    response_cache=response_cache,
+                    use_cache=use_cache,
+                    token_callback=show_streaming_progress,
+                ),
+                on_result=show_structured_result,
+            )
+        )
+
+        progress_bar.progress(1.0)
+        status_text.text("Évaluation terminée!")
+        stream_status.empty()
+
+        # Process results
+        evaluations: list[EvaluationResult] = [
+            result
+            for _, result in sorted(results, key=lambda r: submission_order[r[0]])
+            if not isinstance(result, Exception)
+        ]
+
+        with summary_area:
+            if evaluations:
+                excel_report = None
+                if excel_builder:
+                    excel_report = excel_builder.finish(
+                        order=[e.student_name for e in evaluations], include_summary=True
+                    )
+                render_structured_results(
+                    evaluations, output_format, show_details=False, excel_report=excel_report
                 )
+            else:
+                st.error("❌ Aucune évaluation n'a pu être effectuée.")
+
+# Batch job follow-up (kept in session state across reruns)
+batch_job = st.session_state.get("batch_job")
+if batch_job:
+    st.markdown("---")
+    st.subheader("📦 Évaluation en mode batch")
+    if batch_job["id"]:
+        st.info(
+            f"Batch `{batch_job['id']}` soumis pour {batch_job['count']} étudiants. "
+            "Les résultats sont disponibles sous 24h maximum."
+        )
+    if batch_job["cached"]:
+        st.info(f"♻️ {len(batch_job['cached'])} évaluation(s) reprise(s) du cache, sans appel à l'IA.")
+
+    check_col, clear_col = st.columns(2)
+
+    if clear_col.button("🗑️ Oublier ce batch", use_container_width=True):
+        del st.session_state.batch_job
+        st.rerun()
+
+    if check_col.button("🔄 Vérifier le statut", type="primary", use_container_width=True):
+        if batch_job["id"]:
+            with st.spinner("Récupération du statut..."):
+                batch_status, results = run_with_client(
+                    lambda client: retrieve_evaluation_batch_async(
+                        client, batch_job["id"], batch_job["students"]
+                    )
+                )
+        else:
+            # Every student was served from the cache
+            batch_status, results = "completed", []
 
-            # Show summary
-            st.markdown("### 📊 Résumé des évaluations")
-            summary_data = [
-                {
-                    "Étudiant": e.student_name,
-                    "Note": f"{e.note_finale} / {e.note_max}",
-                }
-                for e in evaluations
-            ]
-            st.dataframe(summary_data)
-
-            # Expandable details for each student
-            st.markdown("### 📝 Détails par étudiant")
-            for evaluation in evaluations:
-                with st.expander(f"{evaluation.student_name} - {evaluation.note_finale}/{evaluation.note_max}"):
-                    st.markdown("**Feedback général:**")
-                    st.write(evaluation.feedback_general)
-
-                    st.markdown("**Critères:**")
-                    criteria_data = [
-                        {
-                            "Critère": c.nom,
-                            "Note": f"{c.note}/{c.note_max}",
-                            "Commentaire": c.commentaire,
-                        }
-                        for c in evaluation.criteres
-                    ]
-                    st.dataframe(criteria_data)
+        if results is None:
+            st.info(f"⏳ Batch en cours (statut : {batch_status})")
         else:
-            st.error("❌ Aucune évaluation n'a pu être effectuée.")
+            results_by_name = dict(zip(batch_job["students"], results))
+            store_evaluations(response_cache, batch_job["cache_keys"], results_by_name)
+            results_by_name.update(batch_job["cached"])
+
+            evaluations: list[EvaluationResult] = []
+            for result in map(results_by_name.get, batch_job["order"]):
+                if isinstance(result, Exception):
+                    st.error(f"❌ Erreur: {result}")
+                else:
+                    evaluations.append(result)
+
+            if evaluations:
+                render_structured_results(evaluations, batch_job["output_format"])
+            else:
+                st.error(f"❌ Aucune évaluation n'a pu être effectuée (statut : {batch_status}).")
@@ -1,19 +1,45 @@
 from .llm_evaluator import (
+    create_async_client,
     evaluate_student_work,
     evaluate_student_work_free_format,
     evaluate_student_work_async,
     evaluate_student_work_free_format_async,
+    evaluate_students_batch_async,
     evaluate_all_students_async,
     evaluate_all_students_free_format_async,
+    evaluate_all_students_stream,
+    evaluate_all_students_free_format_stream,
+    evaluate_all_students_batch,
+    submit_evaluation_batch_async,
+    retrieve_evaluation_batch_async,
+    evaluation_cache_keys,
+    load_cached_evaluations,
+    store_evaluations,
+    fit_context_to_budget,
+    fit_submissions_to_budget,
     EvaluationResult,
 )
+from .response_cache import ResponseCache
 
 __all__ = [
+    "create_async_client",
     "evaluate_student_work",
     "evaluate_student_work_free_format",
     "evaluate_student_work_async",
     "evaluate_student_work_free_format_async",
+    "evaluate_students_batch_async",
     "evaluate_all_students_async",
     "evaluate_all_students_free_format_async",
+    "evaluate_all_students_stream",
+    "evaluate_all_students_free_format_stream",
+    "evaluate_all_students_batch",
+    "submit_evaluation_batch_async",
+    "retrieve_evaluation_batch_async",
+    "evaluation_cache_keys",
+    "load_cached_evaluations",
+    "store_evaluations",
+    "fit_context_to_budget",
+    "fit_submissions_to_budget",
     "EvaluationResult",
+    "ResponseCache",
 ]
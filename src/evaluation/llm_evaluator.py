@@ -1,12 +1,75 @@
 """LLM-based student work evaluator using OpenAI."""
 
 import asyncio
+import contextlib
+import hashlib
+import io
 import json
-from dataclasses import dataclass
-from openai import OpenAI, AsyncOpenAI
+import time
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from typing import Literal
+
+import httpx
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    InternalServerError,
+    OpenAI,
+    RateLimitError,
+)
+from pydantic import BaseModel, Field
+from pydantic_core import from_json
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+from .response_cache import ResponseCache
+
+# Rough token accounting used for rate limiting (OpenAI averages ~4 chars/token)
+CHARS_PER_TOKEN = 4
+ESTIMATED_OUTPUT_TOKENS = 1500
+
+# Retry transient API failures (429, 5xx, timeouts, dropped connections) with
+# randomized exponential backoff, so scattered errors don't fail the student.
+# Invalid responses are not retried. See _call_api. httpx.TransportError
+# covers connections dropped while a response is streamed, which the SDK
+# does not wrap.
+RETRY_TRANSIENT_ERRORS = dict(
+    retry=retry_if_exception_type(
+        (
+            RateLimitError,
+            APITimeoutError,
+            APIConnectionError,
+            InternalServerError,
+            httpx.TransportError,
+        )
+    ),
+    wait=wait_random_exponential(min=1, max=60),
+    stop=stop_after_attempt(6),
+    reraise=True,
+)
+
+# Context window of the supported models, in tokens
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-5.2": 400_000,
+    "gpt-4.1": 1_047_576,
+    "gpt-4o": 128_000,
+}
+DEFAULT_CONTEXT_WINDOW = 128_000
+
+# Share of the context window used when fitting prompts, since token counts
+# are estimated from the text length
+CONTEXT_SAFETY_MARGIN = 0.9
+
+# Largest share of that budget the student works of one request may take.
+# Longer works are trimmed, so that one oversized submission cannot leave the
+# whole cohort without its grid and knowledge base.
+SUBMISSION_BUDGET_SHARE = 0.5
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CriterionEvaluation:
     """Evaluation of a single criterion."""
 
@@ -16,106 +79,610 @@ class CriterionEvaluation:
     commentaire: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class EvaluationResult:
     """Complete evaluation result for a student."""
 
     student_name: str
     feedback_general: str
-    criteres: list[CriterionEvaluation]
-    note_finale: float
-    note_max: float
-
-
-EVALUATION_JSON_SCHEMA = {
-    "type": "json_schema",
-    "json_schema": {
-        "name": "evaluation_result",
-        "strict": True,
-        "schema": {
-            "type": "object",
-            "properties": {
-                "feedback_general": {
-                    "type": "string",
-                    "description": "General feedback about the student's work",
-                },
-                "criteres": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "nom": {
-                                "type": "string",
-                                "description": "Name of the evaluation criterion",
-                            },
-                            "note": {
-                                "type": "integer",
-                                "description": "Score for this criterion",
-                            },
-                            "note_max": {
-                                "type": "integer",
-                                "description": "Maximum possible score for this criterion",
-                            },
-                            "commentaire": {
-                                "type": "string",
-                                "description": "Comment explaining the score",
-                            },
-                        },
-                        "required": ["nom", "note", "note_max", "commentaire"],
-                        "additionalProperties": False,
-                    },
-                    "description": "List of criterion evaluations",
-                },
-                "note_finale": {
-                    "type": "number",
-                    "description": "Final grade",
-                },
-                "note_max": {
-                    "type": "number",
-                    "description": "Maximum possible grade",
-                },
-            },
-            "required": ["feedback_general", "criteres", "note_finale", "note_max"],
-            "additionalProperties": False,
+    criteres: tuple[CriterionEvaluation, ...]
+    note_finale: int | float
+    note_max: int | float
+
+
+# Response models: the strict JSON schema sent to the model is derived from
+# them, and responses are validated into them. Docstrings and field
+# descriptions end up in the schema sent to the model.
+class CriterionModel(BaseModel):
+    """Schema of one criterion in the LLM response."""
+
+    nom: str = Field(description="Name of the evaluation criterion")
+    note: int = Field(description="Score for this criterion")
+    note_max: int = Field(description="Maximum possible score for this criterion")
+    commentaire: str = Field(description="Comment explaining the score")
+
+
+class EvaluationModel(BaseModel):
+    """Schema of the LLM response for one student."""
+
+    feedback_general: str = Field(description="General feedback about the student's work")
+    criteres: list[CriterionModel] = Field(description="List of criterion evaluations")
+    # int | float keeps whole grades as int, so they print as "15 / 20"
+    note_finale: int | float = Field(description="Final grade")
+    note_max: int | float = Field(description="Maximum possible grade")
+
+
+class StudentEvaluationModel(EvaluationModel):
+    """Evaluation tagged with the student it belongs to."""
+
+    student_name: str = Field(description="Name of the student, exactly as given in the prompt")
+
+
+class BatchEvaluationModel(BaseModel):
+    """Schema of the LLM response when several students share one request."""
+
+    evaluations: list[StudentEvaluationModel] = Field(description="One evaluation per student")
+
+
+def _close_objects(schema: dict) -> dict:
+    """Forbid additional properties on every object of a JSON schema, in place."""
+    if schema.get("type") == "object":
+        schema["additionalProperties"] = False
+    for key in ("$defs", "properties"):
+        for subschema in schema.get(key, {}).values():
+            _close_objects(subschema)
+    if "items" in schema:
+        _close_objects(schema["items"])
+    for subschema in schema.get("anyOf", ()):
+        _close_objects(subschema)
+    return schema
+
+
+def _response_format(model: type[BaseModel]) -> dict:
+    """Build the strict json_schema response format of a response model.
+
+    Same format as chat.completions.parse(response_format=model) sends, for
+    requests that are not sent through parse(). Every field of the response
+    models is required, which strict mode expects, so only additional
+    properties need to be forbidden.
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": model.__name__,
+            "schema": _close_objects(model.model_json_schema()),
+            "strict": True,
         },
-    },
-}
+    }
+
+
+# Response format of the Batch API requests
+EVALUATION_RESPONSE_FORMAT = _response_format(EvaluationModel)
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Estimate the number of tokens of the given texts."""
+    return sum(len(text) for text in texts) // CHARS_PER_TOKEN
+
+
+def trim_to_budget(text: str, max_tokens: int) -> str:
+    """Truncate text so that it fits in roughly max_tokens tokens."""
+    max_chars = max(max_tokens, 0) * CHARS_PER_TOKEN
+    return text if len(text) <= max_chars else text[:max_chars]
+
+
+def submission_token_limit(model: str, students_per_request: int = 1) -> int:
+    """Return the number of tokens one student's work may take in a request.
+
+    Args:
+        model: OpenAI model to use.
+        students_per_request: Number of students evaluated per API call.
+
+    Returns:
+        Token limit of each work.
+    """
+    context_window = MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+    budget = int(context_window * CONTEXT_SAFETY_MARGIN)
+    budget -= ESTIMATED_OUTPUT_TOKENS * students_per_request
+    return int(budget * SUBMISSION_BUDGET_SHARE) // students_per_request
+
+
+def fit_submissions_to_budget(
+    model: str,
+    student_submissions: dict[str, str],
+    students_per_request: int = 1,
+) -> dict[str, str]:
+    """Trim the works longer than submission_token_limit.
+
+    Args:
+        model: OpenAI model to use.
+        student_submissions: Dict mapping student_name to their work content.
+        students_per_request: Number of students evaluated per API call.
+
+    Returns:
+        Dict mapping student_name to their work, truncated if needed.
+    """
+    max_tokens = submission_token_limit(model, students_per_request)
+    return {
+        student_name: trim_to_budget(student_work, max_tokens)
+        for student_name, student_work in student_submissions.items()
+    }
+
+
+def fit_context_to_budget(
+    model: str,
+    system_prompt: str,
+    evaluation_grid: str,
+    knowledge_base: str,
+    custom_instructions: str,
+    student_works: list[str],
+    output_format_instructions: str = "",
+    students_per_request: int = 1,
+) -> tuple[str, str]:
+    """Trim the grid and knowledge base so that every request fits the model.
+
+    The student slot (largest submissions, each counted up to
+    submission_token_limit), system prompt, instructions and expected output
+    are budgeted first, then the evaluation grid; the knowledge base gets
+    whatever remains. Works above the limit must be trimmed with
+    fit_submissions_to_budget.
+
+    Args:
+        model: OpenAI model to use.
+        system_prompt: System prompt for the LLM.
+        evaluation_grid: The evaluation criteria/rubric.
+        knowledge_base: Reference materials for evaluation.
+        custom_instructions: Additional instructions from the professor.
+        student_works: Content of every student's work.
+        output_format_instructions: Instructions for free-format output, if any.
+        students_per_request: Number of students evaluated per API call.
+
+    Returns:
+        Tuple of (evaluation_grid, knowledge_base), truncated if needed.
+    """
+    context_window = MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+    budget = int(context_window * CONTEXT_SAFETY_MARGIN)
+
+    work_limit = submission_token_limit(model, students_per_request)
+    largest_works = sorted(student_works, key=len, reverse=True)[:students_per_request]
+    budget -= sum(min(estimate_tokens(work), work_limit) for work in largest_works)
+    budget -= ESTIMATED_OUTPUT_TOKENS * students_per_request
+    budget -= estimate_tokens(system_prompt, custom_instructions, output_format_instructions)
+
+    evaluation_grid = trim_to_budget(evaluation_grid, budget)
+    budget -= estimate_tokens(evaluation_grid)
+
+    knowledge_base = trim_to_budget(knowledge_base, budget)
+
+    return evaluation_grid, knowledge_base
+
+
+class RateLimiter:
+    """Token bucket limiting both requests and tokens per minute.
+
+    Both buckets start full and refill continuously at their per-minute rate.
+    A request waits until one request slot and its estimated token cost are
+    available, so calls are spread at the account's real capacity instead of
+    bursting into 429 errors.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._available_requests = float(requests_per_minute)
+        self._available_tokens = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._available_requests = min(
+            self.requests_per_minute,
+            self._available_requests + elapsed * self.requests_per_minute / 60,
+        )
+        self._available_tokens = min(
+            self.tokens_per_minute,
+            self._available_tokens + elapsed * self.tokens_per_minute / 60,
+        )
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until one request and the given number of tokens are available."""
+        # A request larger than the whole bucket must still be able to go through
+        tokens = min(tokens, self.tokens_per_minute)
+
+        # The lock keeps waiters first-come first-served
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._available_requests >= 1 and self._available_tokens >= tokens:
+                    self._available_requests -= 1
+                    self._available_tokens -= tokens
+                    return
+
+                request_wait = (1 - self._available_requests) * 60 / self.requests_per_minute
+                token_wait = (tokens - self._available_tokens) * 60 / self.tokens_per_minute
+                await asyncio.sleep(max(request_wait, token_wait, 0.01))
+
+
+async def _call_api(
+    call: callable,
+    tokens: int,
+    rate_limiter: RateLimiter | None = None,
+    semaphore: asyncio.Semaphore | None = None,
+    on_token: callable = None,
+):
+    """Make an API call within the rate and concurrency limits, retrying transient errors.
+
+    Each attempt waits for rate budget, then takes a concurrency slot for the
+    call only: a retried call goes through rate_limiter again, and no slot is
+    held while throttled or backing off.
+
+    Args:
+        call: Coroutine function making the API call.
+        tokens: Estimated token cost of the call.
+        rate_limiter: Optional RateLimiter each attempt must go through.
+        semaphore: Optional semaphore bounding the concurrent calls.
+        on_token: Streaming callback of the call. It is called with None
+            before a retry, so that text streamed by the failed attempt can be
+            discarded.
+
+    Returns:
+        The result of call.
+    """
+    async for attempt in AsyncRetrying(**RETRY_TRANSIENT_ERRORS):
+        with attempt:
+            if on_token and attempt.retry_state.attempt_number > 1:
+                on_token(None)
+            if rate_limiter:
+                await rate_limiter.acquire(tokens)
+            async with semaphore or contextlib.nullcontext():
+                return await call()
+
+
+def _build_evaluation_result(student_name: str, evaluation: EvaluationModel) -> EvaluationResult:
+    """Build an EvaluationResult from a validated LLM response."""
+    return EvaluationResult(
+        student_name=student_name,
+        feedback_general=evaluation.feedback_general,
+        criteres=tuple(
+            CriterionEvaluation(
+                nom=c.nom,
+                note=c.note,
+                note_max=c.note_max,
+                commentaire=c.commentaire,
+            )
+            for c in evaluation.criteres
+        ),
+        note_finale=evaluation.note_finale,
+        note_max=evaluation.note_max,
+    )
+
+
+def _parsed_content(response) -> BaseModel:
+    """Return the parsed object of a chat.completions.parse response.
+
+    Raises:
+        ValueError: If the model refused to answer.
+    """
+    message = response.choices[0].message
+    if message.parsed is None:
+        raise ValueError(f"Evaluation refused by the model: {message.refusal}")
+    return message.parsed
+
+
+async def _stream_completion(
+    client: AsyncOpenAI,
+    on_token: callable,
+    **params,
+) -> tuple[str, str | None, str]:
+    """Stream a chat completion and collect its text.
+
+    Args:
+        client: AsyncOpenAI client instance.
+        on_token: Optional callback(delta) called with each chunk of text as
+            it arrives.
+        **params: Arguments of client.chat.completions.create.
+
+    Returns:
+        Tuple of (content, finish_reason, refusal).
+    """
+    stream = await client.chat.completions.create(stream=True, **params)
+
+    content_parts = []
+    refusal_parts = []
+    finish_reason = None
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        finish_reason = choice.finish_reason or finish_reason
+        if choice.delta.refusal:
+            refusal_parts.append(choice.delta.refusal)
+        delta = choice.delta.content
+        if delta:
+            content_parts.append(delta)
+            if on_token:
+                on_token(delta)
+
+    return "".join(content_parts), finish_reason, "".join(refusal_parts)
+
+
+async def _stream_structured_completion(
+    client: AsyncOpenAI,
+    on_token: callable,
+    response_model: type[BaseModel],
+    **params,
+):
+    """Stream a structured completion and validate it into response_model once complete.
+
+    The JSON is only decoded at the end, off the event loop, rather than
+    re-parsed on every chunk.
+
+    Args:
+        client: AsyncOpenAI client instance.
+        on_token: Optional callback(delta) called with each chunk of the JSON
+            response as it arrives.
+        response_model: Pydantic model the response must follow.
+        **params: Arguments of client.chat.completions.create.
+
+    Returns:
+        The response, validated into response_model.
+
+    Raises:
+        ValueError: If the model refused to answer, or the response was cut
+            at the output token limit or by the content filter.
+    """
+    content, finish_reason, refusal = await _stream_completion(
+        client,
+        on_token,
+        response_format=_response_format(response_model),
+        **params,
+    )
+    if refusal:
+        raise ValueError(f"Evaluation refused by the model: {refusal}")
+    if finish_reason in ("length", "content_filter"):
+        raise ValueError(f"Evaluation response incomplete (finish_reason={finish_reason})")
+
+    return await asyncio.to_thread(response_model.model_validate_json, content)
+
 
+def _match_batch_evaluations(
+    batch: BatchEvaluationModel,
+    expected: list[str],
+) -> list[EvaluationResult]:
+    """Match a multi-student response back to its students, in the order of expected.
 
-def build_evaluation_prompt(
+    Raises:
+        ValueError: If the response does not contain exactly one evaluation
+            per expected student.
+    """
+    by_name = {e.student_name: e for e in batch.evaluations}
+    if len(batch.evaluations) != len(expected) or set(by_name) != set(expected):
+        raise ValueError(
+            f"Batch response mismatch: expected {sorted(expected)}, got {sorted(by_name)}"
+        )
+
+    return [_build_evaluation_result(name, by_name[name]) for name in expected]
+
+
+def _evaluation_to_json(evaluation: EvaluationResult) -> dict:
+    """Serialize an EvaluationResult for the response cache, without the name."""
+    result_json = asdict(evaluation)
+    del result_json["student_name"]
+    return result_json
+
+
+def _evaluation_from_cache(student_name: str, result_json: dict) -> EvaluationResult:
+    """Rebuild an EvaluationResult stored by _evaluation_to_json."""
+    return _build_evaluation_result(student_name, EvaluationModel.model_validate(result_json))
+
+
+def _evaluation_cache_key(model: str, shared_prefix: str, student_work: str) -> str:
+    """Response cache key of a structured evaluation."""
+    return ResponseCache.make_key(model, "evaluation", shared_prefix, student_work)
+
+
+def _free_format_cache_key(
+    model: str,
+    shared_prefix: str,
+    student_name: str,
     student_work: str,
+) -> str:
+    """Response cache key of a free-format evaluation (the name is in its prompt)."""
+    return ResponseCache.make_key(model, "free_format", shared_prefix, student_name, student_work)
+
+
+def _load_cached_responses(response_cache: ResponseCache, cache_keys: dict[str, str]) -> dict:
+    """Look up every student's cache key, keeping only the hits."""
+    cached = {}
+    for student_name, key in cache_keys.items():
+        value = response_cache.get(key)
+        if value is not None:
+            cached[student_name] = value
+    return cached
+
+
+async def _evaluate_with_cache(
+    response_cache: ResponseCache,
+    cache_key: str,
+    use_cache: bool,
+    evaluate: callable,
+    to_cache: callable = None,
+    from_cache: callable = None,
+):
+    """Return the cached result of cache_key, or evaluate and cache it.
+
+    Args:
+        response_cache: ResponseCache to read and fill.
+        cache_key: Key of the response in response_cache.
+        use_cache: Read from response_cache. When False, the result is
+            evaluated again and the cache is refreshed with it.
+        evaluate: Coroutine function computing the result on a miss.
+        to_cache: Optional function turning the result into the cached value.
+        from_cache: Optional function turning a cached value into the result.
+
+    Returns:
+        The cached or newly computed result.
+    """
+    if use_cache:
+        cached = await asyncio.to_thread(response_cache.get, cache_key)
+        if cached is not None:
+            return from_cache(cached) if from_cache else cached
+
+    result = await evaluate()
+    await asyncio.to_thread(response_cache.set, cache_key, to_cache(result) if to_cache else result)
+    return result
+
+
+def build_shared_context(
     evaluation_grid: str,
     knowledge_base: str,
     custom_instructions: str,
+    output_format_instructions: str = "",
 ) -> str:
-    """Build the user prompt for evaluation.
+    """Build the part of the prompt that is common to every student.
 
     Args:
-        student_work: The student's submitted work content.
         evaluation_grid: The evaluation criteria/rubric.
         knowledge_base: Reference materials for evaluation.
         custom_instructions: Additional instructions from the professor.
+        output_format_instructions: Instructions for free-format output, if any.
 
     Returns:
         Formatted prompt string.
     """
-    prompt_parts = []
+    buf = io.StringIO()
+    w = buf.write
 
-    prompt_parts.append("## Grille d'évaluation\n")
-    prompt_parts.append(evaluation_grid)
+    if evaluation_grid:
+        w("## Grille d'évaluation\n\n")
+        w(evaluation_grid)
 
     if knowledge_base:
-        prompt_parts.append("\n\n## Base de connaissances / Documents de référence\n")
-        prompt_parts.append(knowledge_base)
+        if buf.tell():
+            w("\n")
+        w("\n\n## Base de connaissances / Documents de référence\n\n")
+        w(knowledge_base)
 
     if custom_instructions:
-        prompt_parts.append("\n\n## Instructions supplémentaires du professeur\n")
-        prompt_parts.append(custom_instructions)
+        if buf.tell():
+            w("\n")
+        w("\n\n## Instructions supplémentaires du professeur\n\n")
+        w(custom_instructions)
+
+    if output_format_instructions:
+        if buf.tell():
+            w("\n")
+        w("\n\n## Format de sortie attendu\n\n")
+        w(output_format_instructions)
+
+    return buf.getvalue()
+
+
+def build_shared_prefix(
+    system_prompt: str,
+    evaluation_grid: str,
+    knowledge_base: str,
+    custom_instructions: str,
+    output_format_instructions: str = "",
+) -> str:
+    """Build the system message shared by every student's request.
+
+    Fan-out callers build it once per cohort and pass it to each request
+    instead of rebuilding the grid and knowledge base for every student.
+
+    Args:
+        system_prompt: System prompt for the LLM.
+        evaluation_grid: The evaluation criteria/rubric.
+        knowledge_base: Reference materials for evaluation.
+        custom_instructions: Additional instructions from the professor.
+        output_format_instructions: Instructions for free-format output, if any.
+
+    Returns:
+        System message content.
+    """
+    shared_context = build_shared_context(
+        evaluation_grid=evaluation_grid,
+        knowledge_base=knowledge_base,
+        custom_instructions=custom_instructions,
+        output_format_instructions=output_format_instructions,
+    )
+    return f"{system_prompt}\n\n{shared_context}"
 
-    prompt_parts.append("\n\n## Travail de l'étudiant à évaluer\n")
-    prompt_parts.append(student_work)
 
-    return "\n".join(prompt_parts)
+def prompt_cache_key(shared_prefix: str) -> str:
+    """Return the prompt_cache_key sent with every request sharing a prefix.
+
+    OpenAI routes requests with the same key to the same cache, which raises
+    the hit rate on the shared prefix when many students are sent at once.
+    """
+    return hashlib.blake2b(shared_prefix.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def build_evaluation_messages(
+    shared_prefix: str,
+    student_work: str,
+    student_name: str = "",
+) -> list[dict]:
+    """Build the chat messages for evaluating one student.
+
+    Everything that is identical across students (system prompt, grid,
+    knowledge base, instructions) goes into the system message, and the
+    student's work comes last in the user message. The request prefix is then
+    byte-identical for the whole cohort, which lets OpenAI prompt caching bill
+    it at a discount after the first call.
+
+    Args:
+        shared_prefix: Output of build_shared_prefix.
+        student_work: The student's submitted work content.
+        student_name: Student name to show in the prompt, if any.
+
+    Returns:
+        List of chat messages.
+    """
+    if student_name:
+        header = f"## Travail de l'étudiant ({student_name}) à évaluer\n"
+    else:
+        header = "## Travail de l'étudiant à évaluer\n"
+
+    return [
+        {"role": "system", "content": shared_prefix},
+        {"role": "user", "content": f"{header}\n{student_work}"},
+    ]
+
+
+def build_batch_evaluation_messages(
+    shared_prefix: str,
+    students: list[tuple[str, str]],
+) -> list[dict]:
+    """Build the chat messages for evaluating several students in one request.
+
+    Args:
+        shared_prefix: Output of build_shared_prefix.
+        students: List of (student_name, student_work) tuples.
+
+    Returns:
+        List of chat messages.
+    """
+    buf = io.StringIO()
+    w = buf.write
+
+    w("## Travaux des étudiants à évaluer\n\n")
+    w(
+        "Évalue chaque travail indépendamment des autres et renvoie une évaluation "
+        "par étudiant, en reprenant exactement le nom indiqué."
+    )
+
+    for i, (student_name, student_work) in enumerate(students, start=1):
+        w(f"\n\n\n### Étudiant {i} : {student_name}\n\n")
+        w(student_work)
+
+    return [
+        {"role": "system", "content": shared_prefix},
+        {"role": "user", "content": buf.getvalue()},
+    ]
 
 
 def evaluate_student_work(
@@ -143,42 +710,23 @@ def evaluate_student_work(
     Returns:
         EvaluationResult containing feedback and grades.
     """
-    user_prompt = build_evaluation_prompt(
-        student_work=student_work,
+    shared_prefix = build_shared_prefix(
+        system_prompt=system_prompt,
         evaluation_grid=evaluation_grid,
         knowledge_base=knowledge_base,
         custom_instructions=custom_instructions,
     )
+    messages = build_evaluation_messages(shared_prefix, student_work)
 
-    response = client.chat.completions.create(
+    response = client.chat.completions.parse(
         model=model,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        response_format=EVALUATION_JSON_SCHEMA,
+        messages=messages,
+        response_format=EvaluationModel,
         temperature=0.3,  # Lower temperature for more consistent evaluations
+        prompt_cache_key=prompt_cache_key(shared_prefix),
     )
 
-    result_json = json.loads(response.choices[0].message.content)
-
-    criteres = [
-        CriterionEvaluation(
-            nom=c["nom"],
-            note=c["note"],
-            note_max=c["note_max"],
-            commentaire=c["commentaire"],
-        )
-        for c in result_json["criteres"]
-    ]
-
-    return EvaluationResult(
-        student_name=student_name,
-        feedback_general=result_json["feedback_general"],
-        criteres=criteres,
-        note_finale=result_json["note_finale"],
-        note_max=result_json["note_max"],
-    )
+    return _build_evaluation_result(student_name, _parsed_content(response))
 
 
 def evaluate_student_work_free_format(
@@ -208,35 +756,20 @@ def evaluate_student_work_free_format(
     Returns:
         Free-form text evaluation.
     """
-    prompt_parts = []
-
-    if evaluation_grid:
-        prompt_parts.append("## Grille d'évaluation\n")
-        prompt_parts.append(evaluation_grid)
-
-    if knowledge_base:
-        prompt_parts.append("\n\n## Base de connaissances / Documents de référence\n")
-        prompt_parts.append(knowledge_base)
-
-    if custom_instructions:
-        prompt_parts.append("\n\n## Instructions supplémentaires du professeur\n")
-        prompt_parts.append(custom_instructions)
-
-    prompt_parts.append("\n\n## Format de sortie attendu\n")
-    prompt_parts.append(output_format_instructions)
-
-    prompt_parts.append(f"\n\n## Travail de l'étudiant ({student_name}) à évaluer\n")
-    prompt_parts.append(student_work)
-
-    user_prompt = "\n".join(prompt_parts)
+    shared_prefix = build_shared_prefix(
+        system_prompt=system_prompt,
+        evaluation_grid=evaluation_grid,
+        knowledge_base=knowledge_base,
+        custom_instructions=custom_instructions,
+        output_format_instructions=output_format_instructions,
+    )
+    messages = build_evaluation_messages(shared_prefix, student_work, student_name)
 
     response = client.chat.completions.create(
         model=model,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
+        messages=messages,
         temperature=0.3,
+        prompt_cache_key=prompt_cache_key(shared_prefix),
     )
 
     return response.choices[0].message.content
@@ -247,6 +780,36 @@ def evaluate_student_work_free_format(
 # =============================================================================
 
 
+def create_async_client(api_key: str | None = None, max_concurrent: int = 5) -> AsyncOpenAI:
+    """Create an AsyncOpenAI client whose connection pool fits max_concurrent.
+
+    Pass the same client to every evaluation of a run: all concurrent calls
+    then reuse its keep-alive connections instead of paying a TCP/TLS
+    handshake each, or queueing behind httpx's default 100-connection pool.
+
+    The connection pool is bound to the event loop it is first used in.
+    Create the client inside that loop, once per asyncio.run(), and close
+    it before the loop ends, e.g. with "async with create_async_client():".
+
+    Args:
+        api_key: OpenAI API key. Read from OPENAI_API_KEY when omitted.
+        max_concurrent: Highest number of concurrent API calls expected.
+
+    Returns:
+        AsyncOpenAI client instance.
+    """
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=max(max_concurrent * 2, 200),
+            max_keepalive_connections=max(max_concurrent, 100),
+            keepalive_expiry=120,
+        ),
+        timeout=httpx.Timeout(600.0, connect=10.0),
+    )
+    # Transient errors are retried per evaluation, see _call_api
+    return AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+
+
 async def evaluate_student_work_async(
     client: AsyncOpenAI,
     student_name: str,
@@ -256,6 +819,12 @@ async def evaluate_student_work_async(
     system_prompt: str,
     custom_instructions: str = "",
     model: str = "gpt-4o",
+    rate_limiter: RateLimiter | None = None,
+    shared_prefix: str | None = None,
+    response_cache: ResponseCache | None = None,
+    use_cache: bool = True,
+    on_token: callable = None,
+    semaphore: asyncio.Semaphore | None = None,
 ) -> EvaluationResult:
     """Async version: Evaluate a student's work using an LLM.
 
@@ -268,47 +837,127 @@ async def evaluate_student_work_async(
         system_prompt: System prompt for the LLM.
         custom_instructions: Additional instructions from the professor.
         model: OpenAI model to use.
+        rate_limiter: Optional RateLimiter the API call must go through.
+        shared_prefix: Precomputed output of build_shared_prefix. Built from
+            the arguments above when omitted.
+        response_cache: Optional ResponseCache the response is stored in.
+        use_cache: Return the cached response, when there is one, instead of
+            calling the API.
+        on_token: Optional callback(delta) called with each chunk of text as
+            the response is streamed, and with None when the request is
+            retried after a transient error.
+        semaphore: Optional semaphore bounding the concurrent API calls.
 
     Returns:
         EvaluationResult containing feedback and grades.
     """
-    user_prompt = build_evaluation_prompt(
-        student_work=student_work,
-        evaluation_grid=evaluation_grid,
-        knowledge_base=knowledge_base,
-        custom_instructions=custom_instructions,
-    )
+    if shared_prefix is None:
+        shared_prefix = build_shared_prefix(
+            system_prompt=system_prompt,
+            evaluation_grid=evaluation_grid,
+            knowledge_base=knowledge_base,
+            custom_instructions=custom_instructions,
+        )
 
-    response = await client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        response_format=EVALUATION_JSON_SCHEMA,
-        temperature=0.3,
+    async def evaluate() -> EvaluationResult:
+        messages = build_evaluation_messages(shared_prefix, student_work)
+        evaluation = await _call_api(
+            partial(
+                _stream_structured_completion,
+                client,
+                on_token,
+                EvaluationModel,
+                model=model,
+                messages=messages,
+                temperature=0.3,
+                prompt_cache_key=prompt_cache_key(shared_prefix),
+            ),
+            estimate_tokens(*(m["content"] for m in messages)) + ESTIMATED_OUTPUT_TOKENS,
+            rate_limiter,
+            semaphore,
+            on_token,
+        )
+        return _build_evaluation_result(student_name, evaluation)
+
+    if not response_cache:
+        return await evaluate()
+    return await _evaluate_with_cache(
+        response_cache,
+        _evaluation_cache_key(model, shared_prefix, student_work),
+        use_cache,
+        evaluate,
+        to_cache=_evaluation_to_json,
+        from_cache=partial(_evaluation_from_cache, student_name),
     )
 
-    result_json = json.loads(response.choices[0].message.content)
 
-    criteres = [
-        CriterionEvaluation(
-            nom=c["nom"],
-            note=c["note"],
-            note_max=c["note_max"],
-            commentaire=c["commentaire"],
-        )
-        for c in result_json["criteres"]
-    ]
+async def evaluate_students_batch_async(
+    client: AsyncOpenAI,
+    students: list[tuple[str, str]],
+    evaluation_grid: str,
+    knowledge_base: str,
+    system_prompt: str,
+    custom_instructions: str = "",
+    model: str = "gpt-4o",
+    rate_limiter: RateLimiter | None = None,
+    shared_prefix: str | None = None,
+    on_token: callable = None,
+    semaphore: asyncio.Semaphore | None = None,
+) -> list[EvaluationResult]:
+    """Async version: Evaluate several students' works in a single LLM call.
 
-    return EvaluationResult(
-        student_name=student_name,
-        feedback_general=result_json["feedback_general"],
-        criteres=criteres,
-        note_finale=result_json["note_finale"],
-        note_max=result_json["note_max"],
+    Args:
+        client: AsyncOpenAI client instance.
+        students: List of (student_name, student_work) tuples.
+        evaluation_grid: The evaluation criteria/rubric.
+        knowledge_base: Reference materials for evaluation.
+        system_prompt: System prompt for the LLM.
+        custom_instructions: Additional instructions from the professor.
+        model: OpenAI model to use.
+        rate_limiter: Optional RateLimiter the API call must go through.
+        shared_prefix: Precomputed output of build_shared_prefix. Built from
+            the arguments above when omitted.
+        on_token: Optional callback(delta) called with each chunk of text as
+            the response is streamed, and with None when the request is
+            retried after a transient error.
+        semaphore: Optional semaphore bounding the concurrent API calls.
+
+    Returns:
+        List of EvaluationResult, in the same order as students.
+
+    Raises:
+        ValueError: If the response does not contain exactly one evaluation
+            per requested student.
+    """
+    if shared_prefix is None:
+        shared_prefix = build_shared_prefix(
+            system_prompt=system_prompt,
+            evaluation_grid=evaluation_grid,
+            knowledge_base=knowledge_base,
+            custom_instructions=custom_instructions,
+        )
+    messages = build_batch_evaluation_messages(shared_prefix, students)
+
+    batch = await _call_api(
+        partial(
+            _stream_structured_completion,
+            client,
+            on_token,
+            BatchEvaluationModel,
+            model=model,
+            messages=messages,
+            temperature=0.3,
+            prompt_cache_key=prompt_cache_key(shared_prefix),
+        ),
+        estimate_tokens(*(m["content"] for m in messages))
+        + ESTIMATED_OUTPUT_TOKENS * len(students),
+        rate_limiter,
+        semaphore,
+        on_token,
     )
 
+    return _match_batch_evaluations(batch, [name for name, _ in students])
+
 
 async def evaluate_student_work_free_format_async(
     client: AsyncOpenAI,
@@ -320,6 +969,12 @@ async def evaluate_student_work_free_format_async(
     output_format_instructions: str,
     custom_instructions: str = "",
     model: str = "gpt-4o",
+    rate_limiter: RateLimiter | None = None,
+    shared_prefix: str | None = None,
+    on_token: callable = None,
+    response_cache: ResponseCache | None = None,
+    use_cache: bool = True,
+    semaphore: asyncio.Semaphore | None = None,
 ) -> str:
     """Async version: Evaluate a student's work with free-format output.
 
@@ -333,42 +988,329 @@ async def evaluate_student_work_free_format_async(
         output_format_instructions: Instructions for how to format the output.
         custom_instructions: Additional instructions from the professor.
         model: OpenAI model to use.
+        rate_limiter: Optional RateLimiter the API call must go through.
+        shared_prefix: Precomputed output of build_shared_prefix. Built from
+            the arguments above when omitted.
+        on_token: Optional callback(delta) called with each chunk of text as
+            the response is streamed, and with None when the request is
+            retried after a transient error.
+        response_cache: Optional ResponseCache the response is stored in.
+        use_cache: Return the cached response, when there is one, instead of
+            calling the API.
+        semaphore: Optional semaphore bounding the concurrent API calls.
 
     Returns:
         Free-form text evaluation.
     """
-    prompt_parts = []
+    if shared_prefix is None:
+        shared_prefix = build_shared_prefix(
+            system_prompt=system_prompt,
+            evaluation_grid=evaluation_grid,
+            knowledge_base=knowledge_base,
+            custom_instructions=custom_instructions,
+            output_format_instructions=output_format_instructions,
+        )
 
-    if evaluation_grid:
-        prompt_parts.append("## Grille d'évaluation\n")
-        prompt_parts.append(evaluation_grid)
+    async def evaluate() -> str:
+        messages = build_evaluation_messages(shared_prefix, student_work, student_name)
+        content, _, _ = await _call_api(
+            partial(
+                _stream_completion,
+                client,
+                on_token,
+                model=model,
+                messages=messages,
+                temperature=0.3,
+                prompt_cache_key=prompt_cache_key(shared_prefix),
+            ),
+            estimate_tokens(*(m["content"] for m in messages)) + ESTIMATED_OUTPUT_TOKENS,
+            rate_limiter,
+            semaphore,
+            on_token,
+        )
+        return content
+
+    if not response_cache:
+        return await evaluate()
+    return await _evaluate_with_cache(
+        response_cache,
+        _free_format_cache_key(model, shared_prefix, student_name, student_work),
+        use_cache,
+        evaluate,
+    )
 
-    if knowledge_base:
-        prompt_parts.append("\n\n## Base de connaissances / Documents de référence\n")
-        prompt_parts.append(knowledge_base)
 
-    if custom_instructions:
-        prompt_parts.append("\n\n## Instructions supplémentaires du professeur\n")
-        prompt_parts.append(custom_instructions)
+@dataclass(slots=True)
+class _FanOutState:
+    """State shared by the requests of one evaluate_all_students_* run."""
+
+    total: int
+    progress_callback: callable = None
+    token_callback: callable = None
+    response_cache: ResponseCache | None = None
+    cache_keys: dict[str, str] = field(default_factory=dict)
+    # Turn a successful result into the value stored in response_cache, and
+    # a stored value (with its student's name) back into a result
+    to_cache: callable = None
+    from_cache: callable = None
+    completed: int = 0
+
+    def report(self, student_name: str) -> None:
+        """Count one more finished student and report progress."""
+        self.completed += 1
+        if self.progress_callback:
+            self.progress_callback(self.completed, self.total, student_name)
+
+    def on_token(self, label: str) -> callable:
+        """Return the streaming callback of a request, or None."""
+        return partial(self.token_callback, label) if self.token_callback else None
+
+    async def remember(self, pairs: list[tuple[str, object]]) -> list[tuple[str, object]]:
+        """Store the successful results of pairs in the response cache."""
+        if self.response_cache:
+            for student_name, result in pairs:
+                if not isinstance(result, Exception):
+                    value = self.to_cache(result) if self.to_cache else result
+                    await asyncio.to_thread(
+                        self.response_cache.set, self.cache_keys[student_name], value
+                    )
+        return pairs
+
+
+async def _evaluate_one_with_limit(
+    state: _FanOutState,
+    evaluate: callable,
+    student_name: str,
+    student_work: str,
+) -> list[tuple[str, object]]:
+    """Evaluate one student and report its progress.
+
+    evaluate is bound to the run's rate limiter and semaphore, which every
+    attempt of the API call goes through.
+
+    Returns:
+        A single (student_name, result or Exception) pair, in a list.
+    """
+    try:
+        result = await evaluate(
+            student_name=student_name,
+            student_work=student_work,
+            on_token=state.on_token(student_name),
+        )
+    except Exception as e:
+        state.report(student_name)
+        return [(student_name, e)]
 
-    prompt_parts.append("\n\n## Format de sortie attendu\n")
-    prompt_parts.append(output_format_instructions)
+    state.report(student_name)
+    return await state.remember([(student_name, result)])
 
-    prompt_parts.append(f"\n\n## Travail de l'étudiant ({student_name}) à évaluer\n")
-    prompt_parts.append(student_work)
 
-    user_prompt = "\n".join(prompt_parts)
+async def _evaluate_batch_with_limit(
+    state: _FanOutState,
+    evaluate_batch: callable,
+    evaluate_one: callable,
+    batch: list[tuple[str, str]],
+) -> list[tuple[str, object]]:
+    """Evaluate a group of students in one request and report their progress.
+
+    If the grouped response cannot be matched back to its students, or was
+    cut at the output token limit or by the content filter, the group is
+    re-evaluated with one request per student.
+
+    Returns:
+        (student_name, result or Exception) pairs for every student of batch.
+    """
+    try:
+        results = await evaluate_batch(
+            students=batch,
+            on_token=state.on_token(", ".join(name for name, _ in batch)),
+        )
+    except (ValueError, KeyError, TypeError):
+        # Malformed, mismatched, truncated or filtered response: fall back
+        # to per-student calls, which are shorter and filtered separately
+        results = None
+    except Exception as e:
+        results = [e] * len(batch)
+
+    if results is None:
+        fallback = await asyncio.gather(
+            *(_evaluate_one_with_limit(state, evaluate_one, name, work) for name, work in batch)
+        )
+        return [pair for pairs in fallback for pair in pairs]
+
+    for student_name, _ in batch:
+        state.report(student_name)
+    return await state.remember(
+        [(student_name, result) for (student_name, _), result in zip(batch, results)]
+    )
+
+
+async def _fan_out(
+    state: _FanOutState,
+    student_submissions: dict[str, str],
+    cache_key: callable,
+    use_cache: bool,
+    make_requests: callable,
+) -> AsyncIterator[tuple[str, object]]:
+    """Serve the cached students, and run the requests of the others concurrently.
+
+    Args:
+        state: State of the run. Its response_cache, if any, is read and filled.
+        student_submissions: Dict mapping student_name to their work content.
+        cache_key: Function(student_name, student_work) returning the
+            response cache key of a student.
+        use_cache: Read from the response cache.
+        make_requests: Function taking the (student_name, student_work) pairs
+            to evaluate, and returning the coroutines evaluating them. Each
+            coroutine returns (student_name, result or Exception) pairs.
+
+    Yields:
+        (student_name, result or Exception) tuples, in completion order.
+    """
+    cached = {}
+    if state.response_cache:
+        state.cache_keys = {
+            name: cache_key(name, work) for name, work in student_submissions.items()
+        }
+        if use_cache:
+            cached = await asyncio.to_thread(
+                _load_cached_responses, state.response_cache, state.cache_keys
+            )
+
+    items = [(name, work) for name, work in student_submissions.items() if name not in cached]
+
+    # Schedule the API calls before serving cache hits (as_completed alone
+    # would only start them once iterated)
+    tasks = [asyncio.create_task(request) for request in make_requests(items)]
+    try:
+        for student_name, value in cached.items():
+            state.report(student_name)
+            yield student_name, state.from_cache(student_name, value) if state.from_cache else value
+
+        for next_done in asyncio.as_completed(tasks):
+            for pair in await next_done:
+                yield pair
+    finally:
+        # The caller stopped early: do not leave requests running
+        for task in tasks:
+            task.cancel()
+
+
+async def evaluate_all_students_stream(
+    client: AsyncOpenAI,
+    student_submissions: dict[str, str],
+    evaluation_grid: str,
+    knowledge_base: str,
+    system_prompt: str,
+    custom_instructions: str = "",
+    model: str = "gpt-4o",
+    max_concurrent: int = 5,
+    progress_callback: callable = None,
+    batch_size: int = 1,
+    requests_per_minute: int = 500,
+    tokens_per_minute: int = 2_000_000,
+    response_cache: ResponseCache | None = None,
+    use_cache: bool = True,
+    token_callback: callable = None,
+) -> AsyncIterator[tuple[str, EvaluationResult | Exception]]:
+    """Evaluate all students in parallel, yielding each result as it completes.
+
+    When batch_size > 1, students are grouped so that each API call evaluates
+    several of them at once. If a grouped response cannot be matched back to
+    its students, that group is re-evaluated with one call per student.
 
-    response = await client.chat.completions.create(
+    Args:
+        client: AsyncOpenAI client instance.
+        student_submissions: Dict mapping student_name to their work content.
+        evaluation_grid: The evaluation criteria/rubric.
+        knowledge_base: Reference materials for evaluation.
+        system_prompt: System prompt for the LLM.
+        custom_instructions: Additional instructions from the professor.
+        model: OpenAI model to use.
+        max_concurrent: Maximum number of concurrent API calls.
+        progress_callback: Optional callback(completed, total) for progress updates.
+        batch_size: Number of students evaluated per API call.
+        requests_per_minute: Request rate limit of the OpenAI account.
+        tokens_per_minute: Token rate limit of the OpenAI account.
+        response_cache: Optional ResponseCache. Students whose exact request
+            was already answered are served from it without an API call.
+        use_cache: Read from response_cache. When False every student is
+            evaluated again and the cache is refreshed with the new responses.
+        token_callback: Optional callback(student_name, delta) for each chunk
+            of text as responses are streamed, with delta None when a request
+            is retried. Grouped requests report the names of their students
+            joined by ", ".
+
+    Yields:
+        (student_name, EvaluationResult or Exception) tuples, in completion order.
+    """
+    # Clamp the shared context and oversized works once for the whole cohort
+    # (unchanged when the caller already fitted them), then build the prefix
+    # once for every request
+    evaluation_grid, knowledge_base = fit_context_to_budget(
         model=model,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        temperature=0.3,
+        system_prompt=system_prompt,
+        evaluation_grid=evaluation_grid,
+        knowledge_base=knowledge_base,
+        custom_instructions=custom_instructions,
+        student_works=list(student_submissions.values()),
+        students_per_request=max(batch_size, 1),
+    )
+    student_submissions = fit_submissions_to_budget(
+        model, student_submissions, students_per_request=max(batch_size, 1)
+    )
+    shared_prefix = build_shared_prefix(
+        system_prompt=system_prompt,
+        evaluation_grid=evaluation_grid,
+        knowledge_base=knowledge_base,
+        custom_instructions=custom_instructions,
+    )
+    state = _FanOutState(
+        total=len(student_submissions),
+        progress_callback=progress_callback,
+        token_callback=token_callback,
+        response_cache=response_cache,
+        to_cache=_evaluation_to_json,
+        from_cache=_evaluation_from_cache,
     )
 
-    return response.choices[0].message.content
+    shared_params = dict(
+        client=client,
+        evaluation_grid=evaluation_grid,
+        knowledge_base=knowledge_base,
+        system_prompt=system_prompt,
+        custom_instructions=custom_instructions,
+        model=model,
+        shared_prefix=shared_prefix,
+        rate_limiter=RateLimiter(requests_per_minute, tokens_per_minute),
+        semaphore=asyncio.Semaphore(max_concurrent),
+    )
+    evaluate_one = partial(evaluate_student_work_async, **shared_params)
+    evaluate_batch = partial(evaluate_students_batch_async, **shared_params)
+
+    def make_requests(items: list[tuple[str, str]]) -> list:
+        if batch_size <= 1:
+            return [
+                _evaluate_one_with_limit(state, evaluate_one, name, work) for name, work in items
+            ]
+        return [
+            _evaluate_batch_with_limit(
+                state, evaluate_batch, evaluate_one, items[i:i + batch_size]
+            )
+            for i in range(0, len(items), batch_size)
+        ]
+
+    async with contextlib.aclosing(
+        _fan_out(
+            state,
+            student_submissions,
+            lambda name, work: _evaluation_cache_key(model, shared_prefix, work),
+            use_cache,
+            make_requests,
+        )
+    ) as results:
+        async for pair in results:
+            yield pair
 
 
 async def evaluate_all_students_async(
@@ -381,57 +1323,159 @@ async def evaluate_all_students_async(
     model: str = "gpt-4o",
     max_concurrent: int = 5,
     progress_callback: callable = None,
+    batch_size: int = 1,
+    requests_per_minute: int = 500,
+    tokens_per_minute: int = 2_000_000,
+    response_cache: ResponseCache | None = None,
+    use_cache: bool = True,
+    mode: Literal["realtime", "batch"] = "realtime",
 ) -> list[EvaluationResult | Exception]:
     """Evaluate all students in parallel with concurrency control.
 
+    Same as evaluate_all_students_stream, but waits for every student.
+    With mode="batch", the students are sent through the OpenAI Batch API
+    instead (see evaluate_all_students_batch); the concurrency, grouping and
+    rate limit settings then do not apply.
+
+    Returns:
+        List of EvaluationResult or Exception for each student, in the order
+        of student_submissions.
+    """
+    if mode == "batch":
+        return await evaluate_all_students_batch(
+            client=client,
+            student_submissions=student_submissions,
+            evaluation_grid=evaluation_grid,
+            knowledge_base=knowledge_base,
+            system_prompt=system_prompt,
+            custom_instructions=custom_instructions,
+            model=model,
+            progress_callback=progress_callback,
+            response_cache=response_cache,
+            use_cache=use_cache,
+        )
+
+    results = {
+        student_name: result
+        async for student_name, result in evaluate_all_students_stream(
+            client=client,
+            student_submissions=student_submissions,
+            evaluation_grid=evaluation_grid,
+            knowledge_base=knowledge_base,
+            system_prompt=system_prompt,
+            custom_instructions=custom_instructions,
+            model=model,
+            max_concurrent=max_concurrent,
+            progress_callback=progress_callback,
+            batch_size=batch_size,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            response_cache=response_cache,
+            use_cache=use_cache,
+        )
+    }
+
+    return [results[student_name] for student_name in student_submissions]
+
+
+async def evaluate_all_students_free_format_stream(
+    client: AsyncOpenAI,
+    student_submissions: dict[str, str],
+    evaluation_grid: str,
+    knowledge_base: str,
+    system_prompt: str,
+    output_format_instructions: str,
+    custom_instructions: str = "",
+    model: str = "gpt-4o",
+    max_concurrent: int = 5,
+    progress_callback: callable = None,
+    requests_per_minute: int = 500,
+    tokens_per_minute: int = 2_000_000,
+    token_callback: callable = None,
+    response_cache: ResponseCache | None = None,
+    use_cache: bool = True,
+) -> AsyncIterator[tuple[str, str | Exception]]:
+    """Evaluate all students in parallel with free-format output, yielding each
+    result as it completes.
+
     Args:
         client: AsyncOpenAI client instance.
         student_submissions: Dict mapping student_name to their work content.
         evaluation_grid: The evaluation criteria/rubric.
         knowledge_base: Reference materials for evaluation.
         system_prompt: System prompt for the LLM.
+        output_format_instructions: Instructions for output format.
         custom_instructions: Additional instructions from the professor.
         model: OpenAI model to use.
         max_concurrent: Maximum number of concurrent API calls.
         progress_callback: Optional callback(completed, total) for progress updates.
-
-    Returns:
-        List of EvaluationResult or Exception for each student.
+        requests_per_minute: Request rate limit of the OpenAI account.
+        tokens_per_minute: Token rate limit of the OpenAI account.
+        token_callback: Optional callback(student_name, delta) for each chunk
+            of text as responses are streamed, with delta None when a request
+            is retried.
+        response_cache: Optional ResponseCache. Students whose exact request
+            was already answered are served from it without an API call.
+        use_cache: Read from response_cache. When False every student is
+            evaluated again and the cache is refreshed with the new responses.
+
+    Yields:
+        (student_name, content or Exception) tuples, in completion order.
     """
-    semaphore = asyncio.Semaphore(max_concurrent)
-    completed = 0
-    total = len(student_submissions)
+    # Clamp the shared context and oversized works once for the whole cohort
+    # (unchanged when the caller already fitted them), then build the prefix
+    # once for every request
+    evaluation_grid, knowledge_base = fit_context_to_budget(
+        model=model,
+        system_prompt=system_prompt,
+        evaluation_grid=evaluation_grid,
+        knowledge_base=knowledge_base,
+        custom_instructions=custom_instructions,
+        student_works=list(student_submissions.values()),
+        output_format_instructions=output_format_instructions,
+    )
+    student_submissions = fit_submissions_to_budget(model, student_submissions)
+    shared_prefix = build_shared_prefix(
+        system_prompt=system_prompt,
+        evaluation_grid=evaluation_grid,
+        knowledge_base=knowledge_base,
+        custom_instructions=custom_instructions,
+        output_format_instructions=output_format_instructions,
+    )
+    state = _FanOutState(
+        total=len(student_submissions),
+        progress_callback=progress_callback,
+        token_callback=token_callback,
+        response_cache=response_cache,
+    )
 
-    async def evaluate_with_semaphore(student_name: str, student_work: str):
-        nonlocal completed
-        async with semaphore:
-            try:
-                result = await evaluate_student_work_async(
-                    client=client,
-                    student_name=student_name,
-                    student_work=student_work,
-                    evaluation_grid=evaluation_grid,
-                    knowledge_base=knowledge_base,
-                    system_prompt=system_prompt,
-                    custom_instructions=custom_instructions,
-                    model=model,
-                )
-                completed += 1
-                if progress_callback:
-                    progress_callback(completed, total, student_name)
-                return result
-            except Exception as e:
-                completed += 1
-                if progress_callback:
-                    progress_callback(completed, total, student_name)
-                return e
-
-    tasks = [
-        evaluate_with_semaphore(name, work)
-        for name, work in student_submissions.items()
-    ]
+    evaluate_one = partial(
+        evaluate_student_work_free_format_async,
+        client=client,
+        evaluation_grid=evaluation_grid,
+        knowledge_base=knowledge_base,
+        system_prompt=system_prompt,
+        output_format_instructions=output_format_instructions,
+        custom_instructions=custom_instructions,
+        model=model,
+        shared_prefix=shared_prefix,
+        rate_limiter=RateLimiter(requests_per_minute, tokens_per_minute),
+        semaphore=asyncio.Semaphore(max_concurrent),
+    )
 
-    return await asyncio.gather(*tasks)
+    async with contextlib.aclosing(
+        _fan_out(
+            state,
+            student_submissions,
+            partial(_free_format_cache_key, model, shared_prefix),
+            use_cache,
+            lambda items: [
+                _evaluate_one_with_limit(state, evaluate_one, name, work) for name, work in items
+            ],
+        )
+    ) as results:
+        async for pair in results:
+            yield pair
 
 
 async def evaluate_all_students_free_format_async(
@@ -445,56 +1489,372 @@ async def evaluate_all_students_free_format_async(
     model: str = "gpt-4o",
     max_concurrent: int = 5,
     progress_callback: callable = None,
+    requests_per_minute: int = 500,
+    tokens_per_minute: int = 2_000_000,
+    response_cache: ResponseCache | None = None,
+    use_cache: bool = True,
 ) -> list[tuple[str, str | Exception]]:
     """Evaluate all students in parallel with free-format output.
 
+    Same as evaluate_all_students_free_format_stream, but waits for every student.
+
+    Returns:
+        List of (student_name, content or Exception) tuples, in the order of
+        student_submissions.
+    """
+    results = {
+        student_name: result
+        async for student_name, result in evaluate_all_students_free_format_stream(
+            client=client,
+            student_submissions=student_submissions,
+            evaluation_grid=evaluation_grid,
+            knowledge_base=knowledge_base,
+            system_prompt=system_prompt,
+            output_format_instructions=output_format_instructions,
+            custom_instructions=custom_instructions,
+            model=model,
+            max_concurrent=max_concurrent,
+            progress_callback=progress_callback,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            response_cache=response_cache,
+            use_cache=use_cache,
+        )
+    }
+
+    return [(student_name, results[student_name]) for student_name in student_submissions]
+
+
+# =============================================================================
+# OpenAI Batch API (results within 24h, at half the price)
+# =============================================================================
+
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# Seconds between two status checks of a running batch
+BATCH_POLL_INTERVAL = 60
+
+
+def evaluation_cache_keys(
+    student_submissions: dict[str, str],
+    evaluation_grid: str,
+    knowledge_base: str,
+    system_prompt: str,
+    custom_instructions: str = "",
+    model: str = "gpt-4o",
+) -> dict[str, str]:
+    """Return the response cache key of each student's structured evaluation.
+
+    Batch API results are stored under these keys, which are shared with the
+    real-time evaluations, so that either mode reuses the other's results.
+
+    Args:
+        student_submissions: Dict mapping student_name to their work content.
+        evaluation_grid: The evaluation criteria/rubric.
+        knowledge_base: Reference materials for evaluation.
+        system_prompt: System prompt for the LLM.
+        custom_instructions: Additional instructions from the professor.
+        model: OpenAI model to use.
+
+    Returns:
+        Dict mapping student_name to their cache key.
+    """
+    shared_prefix = build_shared_prefix(
+        system_prompt=system_prompt,
+        evaluation_grid=evaluation_grid,
+        knowledge_base=knowledge_base,
+        custom_instructions=custom_instructions,
+    )
+    return {
+        name: _evaluation_cache_key(model, shared_prefix, work)
+        for name, work in student_submissions.items()
+    }
+
+
+def load_cached_evaluations(
+    response_cache: ResponseCache,
+    cache_keys: dict[str, str],
+) -> dict[str, EvaluationResult]:
+    """Return the cached evaluations among cache_keys (see evaluation_cache_keys)."""
+    return {
+        name: _evaluation_from_cache(name, result_json)
+        for name, result_json in _load_cached_responses(response_cache, cache_keys).items()
+    }
+
+
+def store_evaluations(
+    response_cache: ResponseCache,
+    cache_keys: dict[str, str],
+    results: dict[str, EvaluationResult | Exception],
+) -> None:
+    """Store the successful results in response_cache, under their cache_keys entry."""
+    for name, result in results.items():
+        if not isinstance(result, Exception):
+            response_cache.set(cache_keys[name], _evaluation_to_json(result))
+
+
+def build_batch_jsonl(
+    student_submissions: dict[str, str],
+    evaluation_grid: str,
+    knowledge_base: str,
+    system_prompt: str,
+    custom_instructions: str = "",
+    model: str = "gpt-4o",
+) -> bytes:
+    """Build the JSONL input file for an OpenAI batch of structured evaluations.
+
+    Args:
+        student_submissions: Dict mapping student_name to their work content.
+        evaluation_grid: The evaluation criteria/rubric.
+        knowledge_base: Reference materials for evaluation.
+        system_prompt: System prompt for the LLM.
+        custom_instructions: Additional instructions from the professor.
+        model: OpenAI model to use.
+
+    Returns:
+        JSONL content, one chat completion request per student.
+    """
+    shared_prefix = build_shared_prefix(
+        system_prompt=system_prompt,
+        evaluation_grid=evaluation_grid,
+        knowledge_base=knowledge_base,
+        custom_instructions=custom_instructions,
+    )
+
+    cache_key = prompt_cache_key(shared_prefix)
+
+    lines = []
+    for student_name, student_work in student_submissions.items():
+        messages = build_evaluation_messages(shared_prefix, student_work)
+        request = {
+            "custom_id": student_name,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model,
+                "messages": messages,
+                "response_format": EVALUATION_RESPONSE_FORMAT,
+                "temperature": 0.3,
+                "prompt_cache_key": cache_key,
+            },
+        }
+        lines.append(json.dumps(request, ensure_ascii=False))
+
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _iter_batch_output(content: str) -> Iterator[tuple[str, EvaluationResult | Exception]]:
+    """Parse a batch output (or error) JSONL file line by line.
+
+    Yields:
+        (custom_id, EvaluationResult or Exception) tuples.
+    """
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+
+        item = from_json(line)
+        student_name = item["custom_id"]
+        response = item.get("response") or {}
+
+        if item.get("error") or response.get("status_code") != 200:
+            error = item.get("error") or response.get("body", {}).get("error") or {}
+            message = error.get("message", "requête en échec")
+            yield student_name, RuntimeError(f"{student_name}: {message}")
+            continue
+
+        try:
+            message_content = response["body"]["choices"][0]["message"]["content"]
+            evaluation = EvaluationModel.model_validate_json(message_content)
+            yield student_name, _build_evaluation_result(student_name, evaluation)
+        except (ValueError, KeyError, TypeError) as e:
+            yield student_name, RuntimeError(f"{student_name}: réponse invalide ({e})")
+
+
+def parse_batch_output(content: str) -> list[EvaluationResult | Exception]:
+    """Parse a batch output (or error) JSONL file into evaluation results.
+
+    Args:
+        content: Text of the JSONL file downloaded from OpenAI.
+
+    Returns:
+        List of EvaluationResult, or Exception for failed requests.
+    """
+    return [result for _, result in _iter_batch_output(content)]
+
+
+async def _download_batch_results(client: AsyncOpenAI, batch) -> dict[str, EvaluationResult | Exception]:
+    """Download and parse the output and error files of a finished batch."""
+    results = {}
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if file_id:
+            file_content = await client.files.content(file_id)
+            results.update(_iter_batch_output(file_content.text))
+    return results
+
+
+async def submit_evaluation_batch_async(
+    client: AsyncOpenAI,
+    student_submissions: dict[str, str],
+    evaluation_grid: str,
+    knowledge_base: str,
+    system_prompt: str,
+    custom_instructions: str = "",
+    model: str = "gpt-4o",
+) -> str:
+    """Upload the evaluations as an OpenAI batch job.
+
     Args:
         client: AsyncOpenAI client instance.
         student_submissions: Dict mapping student_name to their work content.
         evaluation_grid: The evaluation criteria/rubric.
         knowledge_base: Reference materials for evaluation.
         system_prompt: System prompt for the LLM.
-        output_format_instructions: Instructions for output format.
         custom_instructions: Additional instructions from the professor.
         model: OpenAI model to use.
-        max_concurrent: Maximum number of concurrent API calls.
-        progress_callback: Optional callback(completed, total) for progress updates.
 
     Returns:
-        List of (student_name, content or Exception) tuples.
+        ID of the created batch, to pass to retrieve_evaluation_batch_async.
     """
-    semaphore = asyncio.Semaphore(max_concurrent)
-    completed = 0
-    total = len(student_submissions)
+    jsonl = build_batch_jsonl(
+        student_submissions=student_submissions,
+        evaluation_grid=evaluation_grid,
+        knowledge_base=knowledge_base,
+        system_prompt=system_prompt,
+        custom_instructions=custom_instructions,
+        model=model,
+    )
 
-    async def evaluate_with_semaphore(student_name: str, student_work: str):
-        nonlocal completed
-        async with semaphore:
-            try:
-                result = await evaluate_student_work_free_format_async(
-                    client=client,
-                    student_name=student_name,
-                    student_work=student_work,
-                    evaluation_grid=evaluation_grid,
-                    knowledge_base=knowledge_base,
-                    system_prompt=system_prompt,
-                    output_format_instructions=output_format_instructions,
-                    custom_instructions=custom_instructions,
-                    model=model,
-                )
-                completed += 1
-                if progress_callback:
-                    progress_callback(completed, total, student_name)
-                return (student_name, result)
-            except Exception as e:
-                completed += 1
-                if progress_callback:
-                    progress_callback(completed, total, student_name)
-                return (student_name, e)
-
-    tasks = [
-        evaluate_with_semaphore(name, work)
-        for name, work in student_submissions.items()
+    input_file = await client.files.create(
+        file=("evaluations.jsonl", jsonl),
+        purpose="batch",
+    )
+    batch = await client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+
+    return batch.id
+
+
+async def retrieve_evaluation_batch_async(
+    client: AsyncOpenAI,
+    batch_id: str,
+    student_names: list[str],
+) -> tuple[str, list[EvaluationResult | Exception] | None]:
+    """Check an evaluation batch and download its results once finished.
+
+    Args:
+        client: AsyncOpenAI client instance.
+        batch_id: ID returned by submit_evaluation_batch_async.
+        student_names: Names of the submitted students, in submission order.
+
+    Returns:
+        Tuple of (status, results). results is None while the batch is still
+        running, otherwise the list of EvaluationResult or Exception per
+        student, in the order of student_names.
+    """
+    batch = await client.batches.retrieve(batch_id)
+
+    if batch.status not in BATCH_TERMINAL_STATUSES:
+        return batch.status, None
+
+    # Output files follow completion order: put results back by custom_id
+    results = await _download_batch_results(client, batch)
+    return batch.status, [
+        results.get(name)
+        or RuntimeError(f"{name}: aucune réponse (statut du batch : {batch.status})")
+        for name in student_names
     ]
 
-    return await asyncio.gather(*tasks)
+
+async def evaluate_all_students_batch(
+    client: AsyncOpenAI,
+    student_submissions: dict[str, str],
+    evaluation_grid: str,
+    knowledge_base: str,
+    system_prompt: str,
+    custom_instructions: str = "",
+    model: str = "gpt-4o",
+    progress_callback: callable = None,
+    poll_interval: float = BATCH_POLL_INTERVAL,
+    response_cache: ResponseCache | None = None,
+    use_cache: bool = True,
+) -> list[EvaluationResult | Exception]:
+    """Evaluate all students through the OpenAI Batch API and wait for the results.
+
+    Meant for non-interactive runs (e.g. overnight grading): the batch costs
+    half the real-time price but may take up to 24h to complete.
+
+    Args:
+        client: AsyncOpenAI client instance.
+        student_submissions: Dict mapping student_name to their work content.
+        evaluation_grid: The evaluation criteria/rubric.
+        knowledge_base: Reference materials for evaluation.
+        system_prompt: System prompt for the LLM.
+        custom_instructions: Additional instructions from the professor.
+        model: OpenAI model to use.
+        progress_callback: Optional callback(completed, total, student_name),
+            called while polling with the batch's request counts.
+        poll_interval: Seconds between two status checks.
+        response_cache: Optional ResponseCache. Cached students are not sent
+            in the batch, and successful results are stored in it.
+        use_cache: Read from response_cache.
+
+    Returns:
+        List of EvaluationResult or Exception for each student, in the order
+        of student_submissions.
+    """
+    total = len(student_submissions)
+    results: dict[str, EvaluationResult | Exception] = {}
+
+    if response_cache:
+        cache_keys = evaluation_cache_keys(
+            student_submissions=student_submissions,
+            evaluation_grid=evaluation_grid,
+            knowledge_base=knowledge_base,
+            system_prompt=system_prompt,
+            custom_instructions=custom_instructions,
+            model=model,
+        )
+        if use_cache:
+            results = await asyncio.to_thread(load_cached_evaluations, response_cache, cache_keys)
+
+    pending = {
+        name: work for name, work in student_submissions.items() if name not in results
+    }
+
+    if pending:
+        batch_id = await submit_evaluation_batch_async(
+            client=client,
+            student_submissions=pending,
+            evaluation_grid=evaluation_grid,
+            knowledge_base=knowledge_base,
+            system_prompt=system_prompt,
+            custom_instructions=custom_instructions,
+            model=model,
+        )
+
+        while True:
+            batch = await client.batches.retrieve(batch_id)
+            if batch.status in BATCH_TERMINAL_STATUSES:
+                break
+            if progress_callback and batch.request_counts:
+                progress_callback(len(results) + batch.request_counts.completed, total, "")
+            await asyncio.sleep(poll_interval)
+
+        batch_results = await _download_batch_results(client, batch)
+        new_results = {
+            name: batch_results.get(name)
+            or RuntimeError(f"{name}: aucune réponse (statut du batch : {batch.status})")
+            for name in pending
+        }
+        if response_cache:
+            await asyncio.to_thread(store_evaluations, response_cache, cache_keys, new_results)
+        results.update(new_results)
+
+    if progress_callback:
+        progress_callback(total, total, "")
+
+    return [results[student_name] for student_name in student_submissions]
@@ -0,0 +1,69 @@
+"""On-disk cache of LLM evaluation responses."""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+
+class ResponseCache:
+    """JSON files keyed by a hash of the model and the exact request content.
+
+    Re-running an unchanged cohort is then free: only students whose prompt
+    changed (work, grid, knowledge base, instructions, model...) are sent to
+    the API again.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(model: str, *parts: str) -> str:
+        """Build the cache key of a request from its model and content parts."""
+        digest = hashlib.blake2b(digest_size=20)
+        for part in (model, *parts):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str):
+        """Return the cached value for key, or None if absent or unreadable."""
+        try:
+            return json.loads(self._path(key).read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def set(self, key: str, value) -> None:
+        """Store a JSON-serializable value under key."""
+        # Write then rename, so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            # Failed or interrupted write: do not leave the partial file behind
+            os.unlink(tmp_path)
+            raise
+
+    def clear(self) -> int:
+        """Delete every cached response.
+
+        Returns:
+            Number of responses deleted.
+        """
+        count = 0
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+            count += 1
+
+        # Also remove temporary files left by writes that never completed
+        for path in self.directory.glob("*.tmp"):
+            path.unlink(missing_ok=True)
+
+        return count
@@ -1,4 +1,8 @@
-from .excel_export import create_excel_report, create_excel_report_with_summary
+from .excel_export import (
+    ExcelReportBuilder,
+    create_excel_report,
+    create_excel_report_with_summary,
+)
 from .word_export import (
     create_word_document,
     create_word_documents_zip,
@@ -17,6 +21,7 @@ from .combined_export import (
 )
 
 __all__ = [
+    "ExcelReportBuilder",
     "create_excel_report",
     "create_excel_report_with_summary",
     "create_word_document",
@@ -2,18 +2,54 @@
 
 import io
 import zipfile
+from concurrent.futures import Executor
 
 from src.evaluation.llm_evaluator import EvaluationResult
 from .excel_export import create_excel_report_with_summary
 from .word_export import create_word_document, create_free_format_word_document
 from .markdown_export import create_markdown_evaluation, create_markdown_free_format, sanitize_filename
+from .parallel import map_per_student, uses_process_pool
 
 
-def create_combined_export_excel(evaluations: list[EvaluationResult]) -> io.BytesIO:
+def _build_word_export(evaluation: EvaluationResult) -> tuple[str, bytes, bytes]:
+    """Build one student's Word document and markdown file (runs in a worker)."""
+    return (
+        sanitize_filename(evaluation.student_name),
+        create_word_document(evaluation).getvalue(),
+        create_markdown_evaluation(evaluation).encode("utf-8"),
+    )
+
+
+def _build_free_format_export(evaluation: tuple[str, str]) -> tuple[str, bytes, bytes]:
+    """Build one student's free-format Word document and markdown file (runs in a worker)."""
+    student_name, content = evaluation
+    return (
+        sanitize_filename(student_name),
+        create_free_format_word_document(student_name, content).getvalue(),
+        create_markdown_free_format(student_name, content).encode("utf-8"),
+    )
+
+
+def _write_word_and_markdown(zf: zipfile.ZipFile, exports) -> None:
+    """Write (safe_name, word_bytes, markdown_bytes) entries into the ZIP."""
+    for safe_name, word_bytes, markdown_bytes in exports:
+        with zf.open(f"word/{safe_name}.docx", mode="w", force_zip64=True) as f:
+            f.write(word_bytes)
+        with zf.open(f"markdown/{safe_name}.txt", mode="w") as f:
+            f.write(markdown_bytes)
+
+
+def create_combined_export_excel(
+    evaluations: list[EvaluationResult],
+    excel_report: io.BytesIO | None = None,
+) -> io.BytesIO:
     """Create a ZIP containing the Excel report and markdown txt files.
 
     Args:
         evaluations: List of evaluation results.
+        excel_report: Excel report already built for these evaluations (e.g.
+            with ExcelReportBuilder while they were streamed). Built here when
+            omitted.
 
     Returns:
         BytesIO containing the ZIP file.
@@ -23,7 +59,7 @@ def create_combined_export_excel(evaluations: list[EvaluationResult]) -> io.Byte
     # Use ZIP_STORED for better macOS compatibility
     with zipfile.ZipFile(zip_buffer, mode="w", compression=zipfile.ZIP_STORED) as zf:
         # Add Excel report
-        excel_buffer = create_excel_report_with_summary(evaluations)
+        excel_buffer = excel_report or create_excel_report_with_summary(evaluations)
         zf.writestr("evaluations_etudiants.xlsx", excel_buffer.getvalue())
 
         # Add markdown txt files in a subfolder
@@ -36,11 +72,19 @@ def create_combined_export_excel(evaluations: list[EvaluationResult]) -> io.Byte
     return zip_buffer
 
 
-def create_combined_export_word(evaluations: list[EvaluationResult]) -> io.BytesIO:
+def create_combined_export_word(
+    evaluations: list[EvaluationResult],
+    executor: Executor | None = None,
+) -> io.BytesIO:
     """Create a ZIP containing Word documents and markdown txt files.
 
+    Documents are built in worker processes for large cohorts, then written
+    into the ZIP by the calling thread. Otherwise each document is saved
+    straight into its ZIP entry, without an intermediate buffer.
+
     Args:
         evaluations: List of evaluation results.
+        executor: Optional process pool to build the documents in.
 
     Returns:
         BytesIO containing the ZIP file.
@@ -49,16 +93,21 @@ def create_combined_export_word(evaluations: list[EvaluationResult]) -> io.Bytes
 
     # Use ZIP_STORED for better macOS compatibility
     with zipfile.ZipFile(zip_buffer, mode="w", compression=zipfile.ZIP_STORED) as zf:
-        for evaluation in evaluations:
-            safe_name = sanitize_filename(evaluation.student_name)
-
-            # Add Word document
-            word_buffer = create_word_document(evaluation)
-            zf.writestr(f"word/{safe_name}.docx", word_buffer.getvalue())
-
-            # Add markdown txt file
-            markdown_content = create_markdown_evaluation(evaluation)
-            zf.writestr(f"markdown/{safe_name}.txt", markdown_content.encode("utf-8"))
+        if uses_process_pool(len(evaluations)):
+            _write_word_and_markdown(
+                zf, map_per_student(_build_word_export, list(evaluations), executor)
+            )
+        else:
+            for evaluation in evaluations:
+                safe_name = sanitize_filename(evaluation.student_name)
+
+                # Save the Word document straight into its ZIP entry
+                with zf.open(f"word/{safe_name}.docx", mode="w", force_zip64=True) as f:
+                    create_word_document(evaluation, out=f)
+
+                # Add markdown txt file
+                with zf.open(f"markdown/{safe_name}.txt", mode="w") as f:
+                    f.write(create_markdown_evaluation(evaluation).encode("utf-8"))
 
     zip_buffer.seek(0)
     return zip_buffer
@@ -66,11 +115,13 @@ def create_combined_export_word(evaluations: list[EvaluationResult]) -> io.Bytes
 
 def create_combined_export_free_format(
     evaluations: list[tuple[str, str]],
+    executor: Executor | None = None,
 ) -> io.BytesIO:
     """Create a ZIP containing free-format Word documents and markdown txt files.
 
     Args:
         evaluations: List of (student_name, content) tuples.
+        executor: Optional process pool to build the documents in.
 
     Returns:
         BytesIO containing the ZIP file.
@@ -79,16 +130,21 @@ def create_combined_export_free_format(
 
     # Use ZIP_STORED for better macOS compatibility
     with zipfile.ZipFile(zip_buffer, mode="w", compression=zipfile.ZIP_STORED) as zf:
-        for student_name, content in evaluations:
-            safe_name = sanitize_filename(student_name)
-
-            # Add Word document
-            word_buffer = create_free_format_word_document(student_name, content)
-            zf.writestr(f"word/{safe_name}.docx", word_buffer.getvalue())
-
-            # Add markdown txt file
-            markdown_content = create_markdown_free_format(student_name, content)
-            zf.writestr(f"markdown/{safe_name}.txt", markdown_content.encode("utf-8"))
+        if uses_process_pool(len(evaluations)):
+            _write_word_and_markdown(
+                zf, map_per_student(_build_free_format_export, list(evaluations), executor)
+            )
+        else:
+            for student_name, content in evaluations:
+                safe_name = sanitize_filename(student_name)
+
+                # Save the Word document straight into its ZIP entry
+                with zf.open(f"word/{safe_name}.docx", mode="w", force_zip64=True) as f:
+                    create_free_format_word_document(student_name, content, out=f)
+
+                # Add markdown txt file
+                with zf.open(f"markdown/{safe_name}.txt", mode="w") as f:
+                    f.write(create_markdown_free_format(student_name, content).encode("utf-8"))
 
     zip_buffer.seek(0)
     return zip_buffer
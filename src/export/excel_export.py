@@ -2,11 +2,25 @@
 
 import io
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
 
 from src.evaluation.llm_evaluator import EvaluationResult
 
+# Shared styles: openpyxl style objects are immutable, so one instance can be
+# assigned to any number of cells
+_HEADER_FONT = Font(bold=True, size=12)
+_HEADER_FONT_WHITE = Font(bold=True, size=12, color="FFFFFF")
+_HEADER_FILL = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+_TITLE_FONT = Font(bold=True, size=14)
+_THIN_SIDE = Side(style="thin")
+_BORDER = Border(left=_THIN_SIDE, right=_THIN_SIDE, top=_THIN_SIDE, bottom=_THIN_SIDE)
+_CENTER = Alignment(horizontal="center")
+_CENTER_V = Alignment(horizontal="center", vertical="center")
+_WRAP = Alignment(wrap_text=True)
+_WRAP_TOP = Alignment(wrap_text=True, vertical="top")
+
 
 def sanitize_sheet_name(name: str) -> str:
     """Sanitize a string to be used as an Excel sheet name.
@@ -31,138 +45,197 @@ def sanitize_sheet_name(name: str) -> str:
     return sanitized[:31]
 
 
-def create_excel_report(evaluations: list[EvaluationResult]) -> io.BytesIO:
-    """Create an Excel report with one sheet per student.
+def _styled_cell(ws, value, font=None, fill=None, border=None, alignment=None) -> WriteOnlyCell:
+    """Create a cell ready to be appended to a worksheet row, with its styles."""
+    cell = WriteOnlyCell(ws, value=value)
+    if font is not None:
+        cell.font = font
+    if fill is not None:
+        cell.fill = fill
+    if border is not None:
+        cell.border = border
+    if alignment is not None:
+        cell.alignment = alignment
+    return cell
+
+
+def _write_student_sheet(wb: Workbook, evaluation: EvaluationResult):
+    """Append one student's evaluation sheet to a write-only workbook.
 
     Args:
-        evaluations: List of evaluation results for all students.
+        wb: The workbook to add the sheet to.
+        evaluation: Evaluation result for the student.
 
     Returns:
-        BytesIO containing the Excel file.
+        The created worksheet.
+    """
+    sheet_name = sanitize_sheet_name(evaluation.student_name)
+    ws = wb.create_sheet(title=sheet_name)
+
+    # Adjust column widths (before any row is written)
+    ws.column_dimensions["A"].width = 25
+    ws.column_dimensions["B"].width = 10
+    ws.column_dimensions["C"].width = 12
+    ws.column_dimensions["D"].width = 50
+
+    # Title
+    ws.append([_styled_cell(ws, f"Évaluation - {evaluation.student_name}", font=_TITLE_FONT)])
+    ws.merged_cells.add("A1:D1")
+    ws.append([])
+
+    # Criteria table header
+    headers = ["Critère", "Note", "Note Max", "Commentaire"]
+    ws.append([
+        _styled_cell(
+            ws,
+            header,
+            font=_HEADER_FONT_WHITE,
+            fill=_HEADER_FILL,
+            border=_BORDER,
+            alignment=_CENTER_V,
+        )
+        for header in headers
+    ])
+
+    # Criteria rows
+    for criterion in evaluation.criteres:
+        ws.append([
+            _styled_cell(ws, criterion.nom, border=_BORDER),
+            _styled_cell(ws, criterion.note, border=_BORDER, alignment=_CENTER),
+            _styled_cell(ws, criterion.note_max, border=_BORDER, alignment=_CENTER),
+            _styled_cell(ws, criterion.commentaire, border=_BORDER, alignment=_WRAP),
+        ])
+    ws.append([])
+
+    # Final grade
+    ws.append([
+        _styled_cell(ws, "Note finale", font=_HEADER_FONT),
+        _styled_cell(
+            ws, f"{evaluation.note_finale} / {evaluation.note_max}", font=_TITLE_FONT
+        ),
+    ])
+    ws.append([])
+
+    # General feedback section
+    ws.append([_styled_cell(ws, "Feedback général", font=_HEADER_FONT)])
+    ws.append([_styled_cell(ws, evaluation.feedback_general, alignment=_WRAP_TOP)])
+    feedback_row = len(evaluation.criteres) + 8
+    ws.merged_cells.add(f"A{feedback_row}:D{feedback_row + 5}")
+
+    return ws
+
+
+class ExcelReportBuilder:
+    """Excel report built one student sheet at a time, as evaluations arrive.
+
+    Callers streaming evaluations can write each sheet while the remaining
+    API calls are still in flight, instead of building the whole workbook
+    once every student is done.
     """
-    wb = Workbook()
-
-    # Remove default sheet
-    wb.remove(wb.active)
-
-    # Define styles
-    header_font = Font(bold=True, size=12)
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font_white = Font(bold=True, size=12, color="FFFFFF")
-    title_font = Font(bold=True, size=14)
-    border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin"),
-    )
 
-    for evaluation in evaluations:
-        sheet_name = sanitize_sheet_name(evaluation.student_name)
-        ws = wb.create_sheet(title=sheet_name)
-
-        current_row = 1
-
-        # Title
-        ws.cell(row=current_row, column=1, value=f"Évaluation - {evaluation.student_name}")
-        ws.cell(row=current_row, column=1).font = title_font
-        ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=4)
-        current_row += 2
-
-        # Criteria table header
-        headers = ["Critère", "Note", "Note Max", "Commentaire"]
-        for col, header in enumerate(headers, start=1):
-            cell = ws.cell(row=current_row, column=col, value=header)
-            cell.font = header_font_white
-            cell.fill = header_fill
-            cell.border = border
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-        current_row += 1
-
-        # Criteria rows
-        for criterion in evaluation.criteres:
-            ws.cell(row=current_row, column=1, value=criterion.nom).border = border
-            ws.cell(row=current_row, column=2, value=criterion.note).border = border
-            ws.cell(row=current_row, column=2).alignment = Alignment(horizontal="center")
-            ws.cell(row=current_row, column=3, value=criterion.note_max).border = border
-            ws.cell(row=current_row, column=3).alignment = Alignment(horizontal="center")
-            ws.cell(row=current_row, column=4, value=criterion.commentaire).border = border
-            ws.cell(row=current_row, column=4).alignment = Alignment(wrap_text=True)
-            current_row += 1
-
-        current_row += 1
-
-        # Final grade
-        ws.cell(row=current_row, column=1, value="Note finale").font = header_font
-        ws.cell(
-            row=current_row, column=2, value=f"{evaluation.note_finale} / {evaluation.note_max}"
+    def __init__(self):
+        # Write-only mode streams each row to the file instead of keeping
+        # every cell in memory until save
+        self._wb = Workbook(write_only=True)
+        self._sheets = {}
+
+    def add(self, evaluation: EvaluationResult) -> None:
+        """Write the sheet of one student."""
+        self._sheets[evaluation.student_name] = (
+            evaluation,
+            _write_student_sheet(self._wb, evaluation),
         )
-        ws.cell(row=current_row, column=2).font = Font(bold=True, size=14)
-        current_row += 2
 
-        # General feedback section
-        ws.cell(row=current_row, column=1, value="Feedback général").font = header_font
-        current_row += 1
+    def finish(
+        self,
+        order: list[str] | None = None,
+        include_summary: bool = False,
+    ) -> io.BytesIO:
+        """Save the report. No student can be added afterwards.
+
+        Args:
+            order: Student names in the order their sheets should appear.
+                Defaults to the order in which they were added.
+            include_summary: Whether to add a summary sheet first.
 
-        feedback_cell = ws.cell(row=current_row, column=1, value=evaluation.feedback_general)
-        feedback_cell.alignment = Alignment(wrap_text=True, vertical="top")
-        ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row + 5, end_column=4)
-        current_row += 7
+        Returns:
+            BytesIO containing the Excel file.
+        """
+        names = list(self._sheets) if order is None else [n for n in order if n in self._sheets]
 
-        # Adjust column widths
-        ws.column_dimensions["A"].width = 25
-        ws.column_dimensions["B"].width = 10
-        ws.column_dimensions["C"].width = 12
-        ws.column_dimensions["D"].width = 50
+        # Sheets are only serialized on save, so they can still be reordered
+        for index, name in enumerate(names):
+            ws = self._sheets[name][1]
+            self._wb.move_sheet(ws.title, index - self._wb.worksheets.index(ws))
 
-    # Create BytesIO buffer
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
+        if include_summary:
+            create_summary_sheet(self._wb, [self._sheets[name][0] for name in names])
 
-    return buffer
+        # Create BytesIO buffer
+        buffer = io.BytesIO()
+        self._wb.save(buffer)
+        buffer.seek(0)
+
+        return buffer
+
+
+def create_excel_report(
+    evaluations: list[EvaluationResult],
+    include_summary: bool = False,
+) -> io.BytesIO:
+    """Create an Excel report with one sheet per student.
+
+    Args:
+        evaluations: List of evaluation results for all students.
+        include_summary: Whether to add a summary sheet first.
+
+    Returns:
+        BytesIO containing the Excel file.
+    """
+    builder = ExcelReportBuilder()
+    for evaluation in evaluations:
+        builder.add(evaluation)
+
+    return builder.finish(include_summary=include_summary)
 
 
 def create_summary_sheet(wb: Workbook, evaluations: list[EvaluationResult]) -> None:
     """Add a summary sheet with all students' grades.
 
+    The sheet is inserted first.
+
     Args:
         wb: The workbook to add the summary to.
         evaluations: List of all evaluation results.
     """
     ws = wb.create_sheet(title="Résumé", index=0)
 
-    header_font = Font(bold=True, size=12)
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font_white = Font(bold=True, size=12, color="FFFFFF")
-    border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin"),
-    )
+    # Adjust column widths (before any row is written)
+    ws.column_dimensions["A"].width = 30
+    ws.column_dimensions["B"].width = 15
+    ws.column_dimensions["C"].width = 15
 
     # Headers
     headers = ["Étudiant", "Note finale", "Note max"]
-    for col, header in enumerate(headers, start=1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font_white
-        cell.fill = header_fill
-        cell.border = border
-        cell.alignment = Alignment(horizontal="center")
+    ws.append([
+        _styled_cell(
+            ws,
+            header,
+            font=_HEADER_FONT_WHITE,
+            fill=_HEADER_FILL,
+            border=_BORDER,
+            alignment=_CENTER,
+        )
+        for header in headers
+    ])
 
     # Data rows
-    for row, evaluation in enumerate(evaluations, start=2):
-        ws.cell(row=row, column=1, value=evaluation.student_name).border = border
-        ws.cell(row=row, column=2, value=evaluation.note_finale).border = border
-        ws.cell(row=row, column=2).alignment = Alignment(horizontal="center")
-        ws.cell(row=row, column=3, value=evaluation.note_max).border = border
-        ws.cell(row=row, column=3).alignment = Alignment(horizontal="center")
-
-    # Adjust column widths
-    ws.column_dimensions["A"].width = 30
-    ws.column_dimensions["B"].width = 15
-    ws.column_dimensions["C"].width = 15
+    for evaluation in evaluations:
+        ws.append([
+            _styled_cell(ws, evaluation.student_name, border=_BORDER),
+            _styled_cell(ws, evaluation.note_finale, border=_BORDER, alignment=_CENTER),
+            _styled_cell(ws, evaluation.note_max, border=_BORDER, alignment=_CENTER),
+        ])
 
 
 def create_excel_report_with_summary(evaluations: list[EvaluationResult]) -> io.BytesIO:
@@ -174,87 +247,4 @@ def create_excel_report_with_summary(evaluations: list[EvaluationResult]) -> io.
     Returns:
         BytesIO containing the Excel file.
     """
-    wb = Workbook()
-
-    # Remove default sheet
-    wb.remove(wb.active)
-
-    # Define styles
-    header_font = Font(bold=True, size=12)
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font_white = Font(bold=True, size=12, color="FFFFFF")
-    title_font = Font(bold=True, size=14)
-    border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin"),
-    )
-
-    for evaluation in evaluations:
-        sheet_name = sanitize_sheet_name(evaluation.student_name)
-        ws = wb.create_sheet(title=sheet_name)
-
-        current_row = 1
-
-        # Title
-        ws.cell(row=current_row, column=1, value=f"Évaluation - {evaluation.student_name}")
-        ws.cell(row=current_row, column=1).font = title_font
-        ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=4)
-        current_row += 2
-
-        # Criteria table header
-        headers = ["Critère", "Note", "Note Max", "Commentaire"]
-        for col, header in enumerate(headers, start=1):
-            cell = ws.cell(row=current_row, column=col, value=header)
-            cell.font = header_font_white
-            cell.fill = header_fill
-            cell.border = border
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-        current_row += 1
-
-        # Criteria rows
-        for criterion in evaluation.criteres:
-            ws.cell(row=current_row, column=1, value=criterion.nom).border = border
-            ws.cell(row=current_row, column=2, value=criterion.note).border = border
-            ws.cell(row=current_row, column=2).alignment = Alignment(horizontal="center")
-            ws.cell(row=current_row, column=3, value=criterion.note_max).border = border
-            ws.cell(row=current_row, column=3).alignment = Alignment(horizontal="center")
-            ws.cell(row=current_row, column=4, value=criterion.commentaire).border = border
-            ws.cell(row=current_row, column=4).alignment = Alignment(wrap_text=True)
-            current_row += 1
-
-        current_row += 1
-
-        # Final grade
-        ws.cell(row=current_row, column=1, value="Note finale").font = header_font
-        ws.cell(
-            row=current_row, column=2, value=f"{evaluation.note_finale} / {evaluation.note_max}"
-        )
-        ws.cell(row=current_row, column=2).font = Font(bold=True, size=14)
-        current_row += 2
-
-        # General feedback section
-        ws.cell(row=current_row, column=1, value="Feedback général").font = header_font
-        current_row += 1
-
-        feedback_cell = ws.cell(row=current_row, column=1, value=evaluation.feedback_general)
-        feedback_cell.alignment = Alignment(wrap_text=True, vertical="top")
-        ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row + 5, end_column=4)
-        current_row += 7
-
-        # Adjust column widths
-        ws.column_dimensions["A"].width = 25
-        ws.column_dimensions["B"].width = 10
-        ws.column_dimensions["C"].width = 12
-        ws.column_dimensions["D"].width = 50
-
-    # Add summary sheet at the beginning
-    create_summary_sheet(wb, evaluations)
-
-    # Create BytesIO buffer
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-
-    return buffer
+    return create_excel_report(evaluations, include_summary=True)
@@ -1,7 +1,12 @@
 """Markdown text export for evaluation results."""
 
+import re
+
 from src.evaluation.llm_evaluator import EvaluationResult
 
+# Anything but letters, digits, "_", " " and "-" (\w follows str.isalnum)
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w \-]")
+
 
 def create_markdown_evaluation(evaluation: EvaluationResult) -> str:
     """Create a Markdown formatted evaluation for a student.
@@ -12,37 +17,22 @@ def create_markdown_evaluation(evaluation: EvaluationResult) -> str:
     Returns:
         Markdown formatted string.
     """
-    lines = []
-
-    # Title
-    lines.append(f"# Évaluation - {evaluation.student_name}")
-    lines.append("")
-
-    # Final grade
-    lines.append("## Note finale")
-    lines.append("")
-    lines.append(f"**{evaluation.note_finale} / {evaluation.note_max}**")
-    lines.append("")
-
-    # Criteria section
-    lines.append("## Évaluation par critère")
-    lines.append("")
-
-    for criterion in evaluation.criteres:
-        lines.append(f"### {criterion.nom}")
-        lines.append("")
-        lines.append(f"**Note :** {criterion.note} / {criterion.note_max}")
-        lines.append("")
-        lines.append(f"**Commentaire :** {criterion.commentaire}")
-        lines.append("")
-
-    # General feedback
-    lines.append("## Feedback général")
-    lines.append("")
-    lines.append(evaluation.feedback_general)
-    lines.append("")
+    criteria_md = "".join(
+        f"### {criterion.nom}\n\n"
+        f"**Note :** {criterion.note} / {criterion.note_max}\n\n"
+        f"**Commentaire :** {criterion.commentaire}\n\n"
+        for criterion in evaluation.criteres
+    )
 
-    return "\n".join(lines)
+    return (
+        f"# Évaluation - {evaluation.student_name}\n\n"
+        "## Note finale\n\n"
+        f"**{evaluation.note_finale} / {evaluation.note_max}**\n\n"
+        "## Évaluation par critère\n\n"
+        f"{criteria_md}"
+        "## Feedback général\n\n"
+        f"{evaluation.feedback_general}\n"
+    )
 
 
 def create_markdown_free_format(student_name: str, content: str) -> str:
@@ -55,13 +45,7 @@ def create_markdown_free_format(student_name: str, content: str) -> str:
     Returns:
         Markdown formatted string with title.
     """
-    lines = []
-    lines.append(f"# Évaluation - {student_name}")
-    lines.append("")
-    lines.append(content)
-    lines.append("")
-
-    return "\n".join(lines)
+    return f"# Évaluation - {student_name}\n\n{content}\n"
 
 
 def sanitize_filename(name: str) -> str:
@@ -73,7 +57,4 @@ def sanitize_filename(name: str) -> str:
     Returns:
         Sanitized filename.
     """
-    return "".join(
-        c if c.isalnum() or c in (" ", "-", "_") else "_"
-        for c in name
-    )
+    return _UNSAFE_FILENAME_CHARS.sub("_", name)
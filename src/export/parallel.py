@@ -0,0 +1,51 @@
+"""Per-student document building across worker processes."""
+
+import multiprocessing
+import os
+from collections.abc import Callable, Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+# Below this many students, starting worker processes costs more than the
+# parallel build saves
+PARALLEL_EXPORT_MIN_STUDENTS = 20
+
+
+def uses_process_pool(count: int) -> bool:
+    """Tell whether map_per_student would build count students in worker processes."""
+    return (os.cpu_count() or 1) > 1 and count >= PARALLEL_EXPORT_MIN_STUDENTS
+
+
+def map_per_student(
+    build: Callable,
+    items: list,
+    executor: Executor | None = None,
+) -> Iterable:
+    """Apply build to every item, in worker processes for large cohorts.
+
+    python-docx builds and saves documents in pure Python while holding the
+    GIL, so threads would not help: large exports go through processes.
+
+    Args:
+        build: Module-level (picklable) function building one student's files.
+        items: One entry per student.
+        executor: Optional executor to run large cohorts in, such as a
+            long-lived ProcessPoolExecutor shared by the application. Without
+            one, a temporary process pool is used.
+
+    Returns:
+        Results of build, in the order of items.
+    """
+    if not uses_process_pool(len(items)):
+        return map(build, items)
+
+    workers = os.cpu_count() or 1
+    chunksize = max(1, len(items) // (workers * 4))
+
+    if executor is not None:
+        return list(executor.map(build, items, chunksize=chunksize))
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as pool:
+        return list(pool.map(build, items, chunksize=chunksize))
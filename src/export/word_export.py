@@ -1,21 +1,38 @@
 """Word document export for evaluation results."""
 
 import io
+import re
+import zipfile
+from concurrent.futures import Executor
+from typing import BinaryIO
+
 from docx import Document
 from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
 from src.evaluation.llm_evaluator import EvaluationResult
+from .markdown_export import sanitize_filename
+from .parallel import map_per_student, uses_process_pool
+
+# One or more blank (or whitespace-only) lines between paragraphs
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+# DOTALL: a heading paragraph may span several lines
+_HEADING = re.compile(r"(#{1,3}) (.+)", re.DOTALL)
 
 
-def create_word_document(evaluation: EvaluationResult) -> io.BytesIO:
+def create_word_document(
+    evaluation: EvaluationResult,
+    out: BinaryIO | None = None,
+) -> io.BytesIO | None:
     """Create a Word document for a single student evaluation.
 
     Args:
         evaluation: Evaluation result for a student.
+        out: Optional writable stream (such as a ZipFile.open handle) to save
+            the document to directly instead of an intermediate buffer.
 
     Returns:
-        BytesIO containing the Word document.
+        BytesIO containing the Word document, or None when out is given.
     """
     doc = Document()
 
@@ -51,6 +68,10 @@ def create_word_document(evaluation: EvaluationResult) -> io.BytesIO:
     doc.add_heading("Feedback général", level=1)
     doc.add_paragraph(evaluation.feedback_general)
 
+    if out is not None:
+        doc.save(out)
+        return None
+
     # Save to buffer
     buffer = io.BytesIO()
     doc.save(buffer)
@@ -59,33 +80,47 @@ def create_word_document(evaluation: EvaluationResult) -> io.BytesIO:
     return buffer
 
 
-def create_word_documents_zip(evaluations: list[EvaluationResult]) -> io.BytesIO:
+def _docx_filename(student_name: str) -> str:
+    """Build the ZIP entry name of a student's Word document."""
+    return f"{sanitize_filename(student_name)}.docx"
+
+
+def _build_word_document_entry(evaluation: EvaluationResult) -> tuple[str, bytes]:
+    """Build one student's ZIP entry name and Word bytes (runs in a worker)."""
+    return (
+        _docx_filename(evaluation.student_name),
+        create_word_document(evaluation).getvalue(),
+    )
+
+
+def create_word_documents_zip(
+    evaluations: list[EvaluationResult],
+    executor: Executor | None = None,
+) -> io.BytesIO:
     """Create a ZIP containing Word documents for all students.
 
     Args:
         evaluations: List of evaluation results.
+        executor: Optional process pool to build the documents in.
 
     Returns:
         BytesIO containing the ZIP file.
     """
-    import zipfile
-
     zip_buffer = io.BytesIO()
 
     with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-        for evaluation in evaluations:
-            # Create Word document
-            doc_buffer = create_word_document(evaluation)
-
-            # Sanitize filename
-            safe_name = "".join(
-                c if c.isalnum() or c in (" ", "-", "_") else "_"
-                for c in evaluation.student_name
-            )
-            filename = f"{safe_name}.docx"
-
-            # Add to ZIP
-            zf.writestr(filename, doc_buffer.getvalue())
+        if uses_process_pool(len(evaluations)):
+            for filename, doc_bytes in map_per_student(
+                _build_word_document_entry, list(evaluations), executor
+            ):
+                zf.writestr(filename, doc_bytes)
+        else:
+            # Save each document straight into its ZIP entry, without an
+            # intermediate buffer
+            for evaluation in evaluations:
+                filename = _docx_filename(evaluation.student_name)
+                with zf.open(filename, mode="w", force_zip64=True) as f:
+                    create_word_document(evaluation, out=f)
 
     zip_buffer.seek(0)
     return zip_buffer
@@ -94,15 +129,18 @@ def create_word_documents_zip(evaluations: list[EvaluationResult]) -> io.BytesIO
 def create_free_format_word_document(
     student_name: str,
     content: str,
-) -> io.BytesIO:
+    out: BinaryIO | None = None,
+) -> io.BytesIO | None:
     """Create a Word document with free-form content.
 
     Args:
         student_name: Name of the student.
         content: The text content to include.
+        out: Optional writable stream (such as a ZipFile.open handle) to save
+            the document to directly instead of an intermediate buffer.
 
     Returns:
-        BytesIO containing the Word document.
+        BytesIO containing the Word document, or None when out is given.
     """
     doc = Document()
 
@@ -110,20 +148,22 @@ def create_free_format_word_document(
     title = doc.add_heading(f"Évaluation - {student_name}", level=0)
     title.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
-    # Content - split by double newlines for paragraphs
-    paragraphs = content.split("\n\n")
-    for para_text in paragraphs:
-        if para_text.strip():
-            # Check if it looks like a heading (starts with # or is short and uppercase)
-            stripped = para_text.strip()
-            if stripped.startswith("# "):
-                doc.add_heading(stripped[2:], level=1)
-            elif stripped.startswith("## "):
-                doc.add_heading(stripped[3:], level=2)
-            elif stripped.startswith("### "):
-                doc.add_heading(stripped[4:], level=3)
-            else:
-                doc.add_paragraph(stripped)
+    # Content - split on blank lines for paragraphs
+    for para_text in _PARAGRAPH_BREAK.split(content):
+        stripped = para_text.strip()
+        if not stripped:
+            continue
+
+        # Markdown headings ("# ", "## ", "### ") become Word headings
+        heading = _HEADING.match(stripped)
+        if heading:
+            doc.add_heading(heading.group(2), level=len(heading.group(1)))
+        else:
+            doc.add_paragraph(stripped)
+
+    if out is not None:
+        doc.save(out)
+        return None
 
     # Save to buffer
     buffer = io.BytesIO()
@@ -133,35 +173,43 @@ def create_free_format_word_document(
     return buffer
 
 
+def _build_free_format_document_entry(evaluation: tuple[str, str]) -> tuple[str, bytes]:
+    """Build one student's ZIP entry name and free-format Word bytes (runs in a worker)."""
+    student_name, content = evaluation
+    return (
+        _docx_filename(student_name),
+        create_free_format_word_document(student_name, content).getvalue(),
+    )
+
+
 def create_free_format_documents_zip(
     evaluations: list[tuple[str, str]],
+    executor: Executor | None = None,
 ) -> io.BytesIO:
     """Create a ZIP containing free-format Word documents.
 
     Args:
         evaluations: List of (student_name, content) tuples.
+        executor: Optional process pool to build the documents in.
 
     Returns:
         BytesIO containing the ZIP file.
     """
-    import zipfile
-
     zip_buffer = io.BytesIO()
 
     with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-        for student_name, content in evaluations:
-            # Create Word document
-            doc_buffer = create_free_format_word_document(student_name, content)
-
-            # Sanitize filename
-            safe_name = "".join(
-                c if c.isalnum() or c in (" ", "-", "_") else "_"
-                for c in student_name
-            )
-            filename = f"{safe_name}.docx"
-
-            # Add to ZIP
-            zf.writestr(filename, doc_buffer.getvalue())
+        if uses_process_pool(len(evaluations)):
+            for filename, doc_bytes in map_per_student(
+                _build_free_format_document_entry, list(evaluations), executor
+            ):
+                zf.writestr(filename, doc_bytes)
+        else:
+            # Save each document straight into its ZIP entry, without an
+            # intermediate buffer
+            for student_name, content in evaluations:
+                filename = _docx_filename(student_name)
+                with zf.open(filename, mode="w", force_zip64=True) as f:
+                    create_free_format_word_document(student_name, content, out=f)
 
     zip_buffer.seek(0)
     return zip_buffer
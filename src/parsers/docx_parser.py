@@ -1,31 +1,36 @@
 """Word document parser using python-docx."""
 
 import io
+from typing import BinaryIO
 
 from docx import Document
 
 
-def parse_docx(content: bytes) -> str:
+def parse_docx(content: bytes | BinaryIO) -> str:
     """Extract text content from a Word document.
 
     Args:
-        content: Raw bytes of the DOCX file.
+        content: Raw bytes of the DOCX file, or a seekable binary file object.
 
     Returns:
         Extracted text from all paragraphs and tables.
     """
-    doc = Document(io.BytesIO(content))
+    doc = Document(io.BytesIO(content) if isinstance(content, bytes) else content)
     text_parts = []
 
     # Extract text from paragraphs
     for paragraph in doc.paragraphs:
-        if paragraph.text.strip():
-            text_parts.append(paragraph.text)
+        # paragraph.text is rebuilt from the XML runs on every access
+        text = paragraph.text
+        if text.strip():
+            text_parts.append(text)
 
     # Extract text from tables
     for table in doc.tables:
         for row in table.rows:
-            row_text = " | ".join(cell.text.strip() for cell in row.cells if cell.text.strip())
+            stripped = [cell.text.strip() for cell in row.cells]
+            # join() materializes its argument anyway: give it a list directly
+            row_text = " | ".join([text for text in stripped if text])
             if row_text:
                 text_parts.append(row_text)
 
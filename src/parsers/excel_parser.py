@@ -1,31 +1,33 @@
 """Excel document parser using openpyxl."""
 
 import io
+from typing import BinaryIO
 
 from openpyxl import load_workbook
 
 
-def parse_excel(content: bytes) -> str:
+def parse_excel(content: bytes | BinaryIO) -> str:
     """Extract text content from an Excel file.
 
     Args:
-        content: Raw bytes of the Excel file.
+        content: Raw bytes of the Excel file, or a seekable binary file object.
 
     Returns:
         Extracted text from all sheets, formatted as tables.
     """
-    wb = load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+    if isinstance(content, bytes):
+        content = io.BytesIO(content)
+    # Only cell values are needed: skip loading links to external workbooks
+    wb = load_workbook(content, read_only=True, data_only=True, keep_links=False)
     text_parts = []
 
     for sheet_name in wb.sheetnames:
         sheet = wb[sheet_name]
         sheet_text = [f"=== Sheet: {sheet_name} ==="]
 
-        for row in sheet.iter_rows():
-            row_values = []
-            for cell in row:
-                if cell.value is not None:
-                    row_values.append(str(cell.value))
+        # Plain value tuples: no cell object is built per cell
+        for row in sheet.iter_rows(values_only=True):
+            row_values = [str(value) for value in row if value is not None]
             if row_values:
                 sheet_text.append(" | ".join(row_values))
 
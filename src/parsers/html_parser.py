@@ -1,6 +1,38 @@
-"""HTML document parser using BeautifulSoup."""
+"""HTML document parser using lxml."""
 
-from bs4 import BeautifulSoup
+import lxml.html
+from charset_normalizer import from_bytes
+from lxml import etree
+
+# Encodings considered for files that are not valid UTF-8. Detection among
+# all code pages misreads short French texts (e.g. "é" in cp1252 taken for
+# Central European cp1250), so it is limited to the Western ones.
+FALLBACK_ENCODINGS = ["cp1252", "latin_1", "iso8859_15", "utf_16", "utf_32"]
+
+
+def extract_text(html_text: str, remove_tags: tuple[str, ...] = ("script", "style")) -> str:
+    """Extract the text nodes of an HTML document, one per line.
+
+    Args:
+        html_text: The decoded HTML document.
+        remove_tags: Elements whose content is dropped, e.g. scripts.
+
+    Returns:
+        The text nodes joined with newlines, not yet cleaned up.
+    """
+    # The document is already decoded: force UTF-8 so that a charset declared
+    # in the markup cannot make libxml2 decode it a second time
+    parser = lxml.html.HTMLParser(encoding="utf-8")
+    try:
+        tree = lxml.html.document_fromstring(html_text.encode("utf-8"), parser=parser)
+    except etree.ParserError:
+        # Document without any element
+        return ""
+
+    # Drop the elements, and comments, but keep the text that follows them
+    etree.strip_elements(tree, *remove_tags, etree.Comment, with_tail=False)
+
+    return "\n".join(tree.itertext())
 
 
 def parse_html(content: bytes) -> str:
@@ -12,26 +44,16 @@ def parse_html(content: bytes) -> str:
     Returns:
         Extracted text content.
     """
-    # Try to decode with different encodings
-    html_text = None
-    for encoding in ["utf-8", "latin-1", "cp1252"]:
-        try:
-            html_text = content.decode(encoding)
-            break
-        except UnicodeDecodeError:
-            continue
-
-    if html_text is None:
-        html_text = content.decode("utf-8", errors="replace")
-
-    soup = BeautifulSoup(html_text, "html.parser")
-
-    # Remove script and style elements
-    for element in soup(["script", "style"]):
-        element.decompose()
-
-    # Get text content
-    text = soup.get_text(separator="\n")
+    # Most files are UTF-8; only detect the encoding of the others
+    try:
+        html_text = content.decode("utf-8")
+    except UnicodeDecodeError:
+        best = from_bytes(content, cp_isolation=FALLBACK_ENCODINGS).best()
+        # latin-1 maps every byte, so it never fails
+        html_text = str(best) if best else content.decode("latin-1")
+
+    # Get text content, without script and style elements
+    text = extract_text(html_text)
 
     # Clean up whitespace
     lines = (line.strip() for line in text.splitlines())
@@ -1,21 +1,41 @@
 """PDF document parser using PyMuPDF."""
 
+from typing import BinaryIO
+
 import pymupdf
 
+# Plain-text extraction flags: the defaults minus TEXT_PRESERVE_LIGATURES
+# (ligatures are expanded into their letters, which reads better for the
+# LLM), plus TEXT_DEHYPHENATE to rejoin words split at line ends. Images are
+# never extracted.
+PDF_TEXT_FLAGS = (
+    pymupdf.TEXT_PRESERVE_WHITESPACE
+    | pymupdf.TEXT_MEDIABOX_CLIP
+    | pymupdf.TEXT_CID_FOR_UNKNOWN_UNICODE
+    | pymupdf.TEXT_DEHYPHENATE
+)
+
 
-def parse_pdf(content: bytes) -> str:
+def parse_pdf(content: bytes | BinaryIO) -> str:
     """Extract text content from a PDF file.
 
     Args:
-        content: Raw bytes of the PDF file.
+        content: Raw bytes of the PDF file, or a binary file object.
 
     Returns:
         Extracted text from all pages of the PDF.
     """
-    text_parts = []
+    # PyMuPDF takes the whole document as bytes: read file objects once here.
+    # Reading an unmodified BytesIO (such as an UploadedFile) from the start
+    # does not copy.
+    if not isinstance(content, bytes):
+        content.seek(0)
+        content = content.read()
 
     with pymupdf.open(stream=content, filetype="pdf") as doc:
-        for page in doc:
-            text_parts.append(page.get_text())
+        # One slot per page, filled in place
+        text_parts: list[str | None] = [None] * doc.page_count
+        for i, page in enumerate(doc):
+            text_parts[i] = page.get_text("text", flags=PDF_TEXT_FLAGS)
 
     return "\n\n".join(text_parts)
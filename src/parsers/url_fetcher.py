@@ -1,13 +1,44 @@
 """URL content fetcher for web pages."""
 
+import asyncio
 import re
-import requests
-from bs4 import BeautifulSoup
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import httpx
+from bs4.dammit import UnicodeDammit
+
+from .html_parser import extract_text
+
+# Maximum number of URLs fetched at the same time
+MAX_CONCURRENT_FETCHES = 16
+
+# Per-host politeness: at most this many requests in flight to one host, and
+# at least this many seconds between two request starts on that host, so that
+# a list of links to the same site does not trip its anti-bot throttling
+MAX_FETCHES_PER_HOST = 4
+PER_HOST_DELAY = 0.1
+
+_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+
+# Compiled once at import rather than on every parse_urls_from_text call
+_URL_PATTERN = re.compile(
+    r"^https?://"  # http:// or https://
+    r"(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|"  # domain
+    r"localhost|"  # localhost
+    r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})"  # or IP
+    r"(?::\d+)?"  # optional port
+    r"(?:/?|[/?]\S+)$",
+    re.IGNORECASE,
+)
 
 
 def fetch_url_content(url: str, timeout: int = 30) -> str | None:
     """Fetch and extract text content from a URL.
 
+    For several URLs, use fetch_multiple_urls, which shares one client.
+
     Args:
         url: The URL to fetch.
         timeout: Request timeout in seconds.
@@ -16,31 +47,83 @@ def fetch_url_content(url: str, timeout: int = 30) -> str | None:
         Extracted text content, or None if fetching failed.
     """
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=timeout)
-        response.raise_for_status()
+        with httpx.Client(headers={"User-Agent": _USER_AGENT}, follow_redirects=True) as client:
+            response = client.get(url, timeout=timeout)
+            response.raise_for_status()
+    except (httpx.HTTPError, httpx.InvalidURL):
+        return None
 
-        soup = BeautifulSoup(response.content, "html.parser")
+    return _extract_page_text(response.content)
 
-        # Remove script and style elements
-        for element in soup(["script", "style", "nav", "footer", "header"]):
-            element.decompose()
 
-        # Get text content
-        text = soup.get_text(separator="\n")
+def _extract_page_text(html: bytes) -> str:
+    """Extract the readable text of an HTML page.
 
-        # Clean up whitespace
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = "\n".join(chunk for chunk in chunks if chunk)
+    Args:
+        html: Raw bytes of the page.
 
-        return text
+    Returns:
+        The page text, without scripts, styles and navigation, one chunk per line.
+    """
+    # Decode using the charset declared by the page, or a detected one
+    html_text = UnicodeDammit(html, is_html=True).unicode_markup
 
-    except requests.RequestException as e:
+    # Get text content, without script, style and navigation elements
+    text = extract_text(html_text, ("script", "style", "nav", "footer", "header"))
+
+    # Clean up whitespace
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return "\n".join(chunk for chunk in chunks if chunk)
+
+
+class _HostLimiter:
+    """Bound the concurrency and spacing of requests to each host."""
+
+    def __init__(self, max_per_host: int = MAX_FETCHES_PER_HOST, delay: float = PER_HOST_DELAY):
+        self._delay = delay
+        self._semaphores = defaultdict(lambda: asyncio.Semaphore(max_per_host))
+        self._next_start = defaultdict(float)
+
+    def slot(self, host: str) -> asyncio.Semaphore:
+        """Semaphore bounding the requests in flight to host."""
+        return self._semaphores[host]
+
+    async def wait(self, host: str) -> None:
+        """Wait until a new request to host may start."""
+        # Reserve the next start time before sleeping, so that concurrent
+        # callers queue up one delay apart
+        now = time.monotonic()
+        start = max(now, self._next_start[host])
+        self._next_start[host] = start + self._delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+async def fetch_url_content_async(
+    client: httpx.AsyncClient,
+    url: str,
+    timeout: int = 30,
+) -> str | None:
+    """Fetch and extract text content from a URL, without blocking the event loop.
+
+    Args:
+        client: HTTP client to send the request with.
+        url: The URL to fetch.
+        timeout: Request timeout in seconds.
+
+    Returns:
+        Extracted text content, or None if fetching failed.
+    """
+    try:
+        response = await client.get(url, timeout=timeout)
+        response.raise_for_status()
+    except (httpx.HTTPError, httpx.InvalidURL):
         return None
 
+    # Parsing is CPU-bound: keep it off the event loop
+    return await asyncio.to_thread(_extract_page_text, response.content)
+
 
 def parse_urls_from_text(text: str) -> list[str]:
     """Extract URLs from a text string.
@@ -51,35 +134,65 @@ def parse_urls_from_text(text: str) -> list[str]:
     Returns:
         List of valid URLs found.
     """
-    # Split by whitespace and newlines
-    potential_urls = text.split()
+    # split() already strips whitespace and newlines around each candidate
+    return [url for url in text.split() if _URL_PATTERN.match(url)]
+
+
+async def fetch_multiple_urls_async(
+    urls: list[str],
+    max_concurrent: int = MAX_CONCURRENT_FETCHES,
+) -> list[tuple[str, str]]:
+    """Fetch content from multiple URLs concurrently on the event loop.
+
+    At most max_concurrent requests are in flight overall, and requests to the
+    same host are capped and spaced out (see MAX_FETCHES_PER_HOST and
+    PER_HOST_DELAY).
+
+    Args:
+        urls: List of URLs to fetch.
+        max_concurrent: Maximum number of requests in flight at once.
+
+    Returns:
+        List of (url, content) tuples for successful fetches, in the order of urls.
+    """
+    if not urls:
+        return []
 
-    # Filter valid URLs
-    url_pattern = re.compile(
-        r"^https?://"  # http:// or https://
-        r"(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|"  # domain
-        r"localhost|"  # localhost
-        r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})"  # or IP
-        r"(?::\d+)?"  # optional port
-        r"(?:/?|[/?]\S+)$",
-        re.IGNORECASE,
-    )
+    semaphore = asyncio.Semaphore(max_concurrent)
+    host_limiter = _HostLimiter()
 
-    return [url.strip() for url in potential_urls if url_pattern.match(url.strip())]
+    async with httpx.AsyncClient(
+        headers={"User-Agent": _USER_AGENT},
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=max_concurrent),
+    ) as client:
+
+        async def fetch(url: str) -> str | None:
+            host = urlsplit(url).hostname or ""
+            # Queue on the host first: URLs waiting for a busy host must not
+            # hold global slots that fetches to other hosts could use
+            async with host_limiter.slot(host):
+                await host_limiter.wait(host)
+                async with semaphore:
+                    return await fetch_url_content_async(client, url)
+
+        contents = await asyncio.gather(*(fetch(url) for url in urls))
+
+    return [(url, content) for url, content in zip(urls, contents) if content]
 
 
 def fetch_multiple_urls(urls: list[str]) -> list[tuple[str, str]]:
-    """Fetch content from multiple URLs.
+    """Fetch content from multiple URLs concurrently.
+
+    Synchronous wrapper around fetch_multiple_urls_async.
 
     Args:
         urls: List of URLs to fetch.
 
     Returns:
-        List of (url, content) tuples for successful fetches.
+        List of (url, content) tuples for successful fetches, in the order of urls.
     """
-    results = []
-    for url in urls:
-        content = fetch_url_content(url)
-        if content:
-            results.append((url, content))
-    return results
+    if not urls:
+        return []
+
+    return asyncio.run(fetch_multiple_urls_async(urls))
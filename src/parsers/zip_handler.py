@@ -1,9 +1,21 @@
 """ZIP file handler for extracting student submissions."""
 
-import re
+import multiprocessing
+import os
 import zipfile
 import io
-from pathlib import PurePosixPath
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import BinaryIO
+
+from .pdf_parser import parse_pdf
+from .docx_parser import parse_docx
+from .excel_parser import parse_excel
+from .html_parser import parse_html
+
+# Marker following the student name and ID in Moodle submission folders
+_MOODLE_TAG = "_assignsubmission_"
 
 
 def extract_student_name_from_moodle_folder(folder_name: str) -> str | None:
@@ -18,38 +30,55 @@ def extract_student_name_from_moodle_folder(folder_name: str) -> str | None:
     Returns:
         Extracted student name, or None if not a Moodle format.
     """
-    # Moodle pattern: Name_Numbers_assignsubmission_type
-    match = re.match(r"^(.+?)_\d+_assignsubmission_", folder_name)
-    if match:
-        return match.group(1).strip()
+    # Moodle pattern: Name_Numbers_assignsubmission_type, matched with plain
+    # string operations. The first tag preceded by "_<digits>" and a
+    # non-empty name wins.
+    end = folder_name.find(_MOODLE_TAG)
+    while end != -1:
+        name, _, user_id = folder_name[:end].rpartition("_")
+        if name and user_id.isdecimal():
+            return name.strip()
+        end = folder_name.find(_MOODLE_TAG, end + 1)
     return None
 
 
-def extract_student_submissions(zip_content: bytes) -> dict[str, list[tuple[str, bytes]]]:
-    """Extract student submissions from a ZIP file.
+def _read_entry(zf: zipfile.ZipFile, file_info: zipfile.ZipInfo) -> bytes:
+    """Read one ZIP entry straight from its ZipInfo."""
+    with zf.open(file_info) as fp:
+        return fp.read()
+
+
+def iter_submissions(zip_source: bytes | BinaryIO) -> Iterator[tuple[str, str, Callable[[], bytes]]]:
+    """Yield student files from a ZIP file without reading their content.
 
     Supports two formats:
     1. Simple: Each folder at root level = one student
     2. Moodle: Assignment folder > Student_ID_assignsubmission_type > files
 
+    Each file comes with a reader decompressing it on demand, so callers
+    only pay for the files they keep. The archive stays open until the
+    iteration ends: readers must be called before that.
+
     Args:
-        zip_content: Raw bytes of the ZIP file.
+        zip_source: Raw bytes of the ZIP file, or a seekable binary file
+            object (such as a Streamlit UploadedFile) read in place.
 
-    Returns:
-        Dictionary mapping student names to list of (filename, content) tuples.
+    Yields:
+        (student_name, filename, read) tuples, in archive order, read()
+        returning the file content.
     """
-    students: dict[str, list[tuple[str, bytes]]] = {}
+    if isinstance(zip_source, bytes):
+        zip_source = io.BytesIO(zip_source)
 
-    with zipfile.ZipFile(io.BytesIO(zip_content), "r") as zf:
+    with zipfile.ZipFile(zip_source, "r") as zf:
         for file_info in zf.infolist():
             # Skip directories and Mac metadata
             if file_info.is_dir() or "__MACOSX" in file_info.filename:
                 continue
 
-            # Parse the path
-            path = PurePosixPath(file_info.filename)
-            parts = path.parts
-            filename = path.name
+            # Parse the path: ZIP entry names always use "/" separators
+            parts = [part for part in file_info.filename.split("/") if part and part != "."]
+            filename = parts[-1]
 
             # Skip hidden files
             if filename.startswith("."):
@@ -73,48 +102,142 @@ def extract_student_submissions(zip_content: bytes) -> dict[str, list[tuple[str,
             if student_name is None:
                 student_name = parts[0]
 
-            # Read file content
-            content = zf.read(file_info.filename)
+            yield student_name, filename, partial(_read_entry, zf, file_info)
+
+
+def iter_student_files(zip_source: bytes | BinaryIO) -> Iterator[tuple[str, str, bytes]]:
+    """Yield student files one by one as they are read from a ZIP file.
+
+    Args:
+        zip_source: Raw bytes of the ZIP file, or a seekable binary file
+            object (such as a Streamlit UploadedFile) read in place.
+
+    Only files in a supported format are read and yielded.
+
+    Yields:
+        (student_name, filename, content) tuples, in archive order.
+    """
+    for student_name, filename, read in iter_submissions(zip_source):
+        # Unsupported files (images, videos...) would be dropped by the
+        # parser anyway: do not decompress them
+        if _extension(filename) in _PARSERS:
+            yield student_name, filename, read()
+
+
+def extract_student_submissions(zip_source: bytes | BinaryIO) -> dict[str, list[tuple[str, bytes]]]:
+    """Extract student submissions from a ZIP file.
+
+    Args:
+        zip_source: Raw bytes of the ZIP file, or a seekable binary file object.
+
+    Returns:
+        Dictionary mapping student names to list of (filename, content) tuples.
+    """
+    students: dict[str, list[tuple[str, bytes]]] = {}
 
-            if student_name not in students:
-                students[student_name] = []
+    for student_name, filename, content in iter_student_files(zip_source):
+        if student_name not in students:
+            students[student_name] = []
 
-            students[student_name].append((filename, content))
+        students[student_name].append((filename, content))
 
     return students
 
 
+def parse_submissions(
+    students: dict[str, list[tuple[str, bytes]]],
+    executor: Executor | None = None,
+) -> dict[str, list[tuple[str, str | None]]]:
+    """Parse every extracted file, in worker processes when several cores exist.
+
+    The parsers are pure Python or hold the GIL, so files are parsed in
+    processes rather than threads.
+
+    Args:
+        students: Submissions as returned by extract_student_submissions.
+        executor: Optional executor to parse in, such as a long-lived
+            ProcessPoolExecutor shared by the application. Without one, a
+            temporary process pool is used.
+
+    Returns:
+        Dictionary mapping student names to list of (filename, text) tuples,
+        text being None for unsupported formats.
+    """
+    owners = [student_name for student_name, files in students.items() for _ in files]
+    filenames = [filename for files in students.values() for filename, _ in files]
+    contents = [content for files in students.values() for _, content in files]
+
+    if executor is not None:
+        texts = list(executor.map(parse_document, filenames, contents))
+    elif (os.cpu_count() or 1) > 1 and len(contents) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(os.cpu_count(), len(contents)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            texts = list(pool.map(parse_document, filenames, contents))
+    else:
+        texts = list(map(parse_document, filenames, contents))
+
+    parsed: dict[str, list[tuple[str, str | None]]] = {student_name: [] for student_name in students}
+    for student_name, filename, text in zip(owners, filenames, texts):
+        parsed[student_name].append((filename, text))
+
+    return parsed
+
+
+def _extension(filename: str) -> str:
+    """Lowercase extension of filename, dot included."""
+    return "." + filename.rpartition(".")[2].lower()
+
+
+def _parse_text(content: bytes) -> str:
+    """Decode a plain text or Markdown file."""
+    return content.decode("utf-8", errors="replace")
+
+
+# Parser of each supported extension
+_PARSERS = {
+    ".pdf": parse_pdf,
+    ".docx": parse_docx,
+    ".xlsx": parse_excel,
+    ".xls": parse_excel,
+    ".html": parse_html,
+    ".htm": parse_html,
+    ".txt": _parse_text,
+    ".md": _parse_text,
+}
+
+# Extensions whose parser reads file objects directly
+_FILE_OBJECT_EXTENSIONS = {".pdf", ".docx", ".xlsx", ".xls"}
+
+
 def get_supported_extensions() -> set[str]:
     """Return the set of supported file extensions."""
-    return {".pdf", ".docx", ".xlsx", ".xls", ".txt", ".md", ".html", ".htm"}
+    return set(_PARSERS)
 
 
-def parse_document(filename: str, content: bytes) -> str | None:
+def parse_document(filename: str, content: bytes | BinaryIO) -> str | None:
     """Parse a document based on its extension.
 
     Args:
         filename: Name of the file (used to determine type).
-        content: Raw bytes of the file.
+        content: Raw bytes of the file, or a seekable binary file object
+            (such as a Streamlit UploadedFile), read from the start without
+            copying it first.
 
     Returns:
         Extracted text content, or None if format not supported.
     """
-    from .pdf_parser import parse_pdf
-    from .docx_parser import parse_docx
-    from .excel_parser import parse_excel
-    from .html_parser import parse_html
-
-    ext = PurePosixPath(filename).suffix.lower()
-
-    if ext == ".pdf":
-        return parse_pdf(content)
-    elif ext == ".docx":
-        return parse_docx(content)
-    elif ext in (".xlsx", ".xls"):
-        return parse_excel(content)
-    elif ext in (".html", ".htm"):
-        return parse_html(content)
-    elif ext in (".txt", ".md"):
-        return content.decode("utf-8", errors="replace")
-
-    return None
+    ext = _extension(filename)
+    parse = _PARSERS.get(ext)
+    if parse is None:
+        return None
+
+    if not isinstance(content, bytes):
+        content.seek(0)
+        # PyMuPDF and python-docx/openpyxl read file objects directly; the
+        # text formats need the bytes
+        if ext not in _FILE_OBJECT_EXTENSIONS:
+            content = content.read()
+
+    return parse(content)
@@ -0,0 +1,165 @@
+"""Tests for the LLM evaluator, against a stubbed OpenAI API."""
+
+import json
+import unittest
+from unittest import mock
+
+import httpx
+from openai import AsyncOpenAI
+from tenacity import wait_none
+
+from src.evaluation import (
+    EvaluationResult,
+    evaluate_all_students_free_format_stream,
+    evaluate_all_students_stream,
+    fit_context_to_budget,
+    fit_submissions_to_budget,
+)
+from src.evaluation import llm_evaluator
+
+EVALUATION = {
+    "feedback_general": "Bon travail",
+    "criteres": [{"nom": "Clarté", "note": 4, "note_max": 5, "commentaire": "Clair"}],
+    "note_finale": 4,
+    "note_max": 5,
+}
+
+
+def _sse_response(content: str, finish_reason: str) -> httpx.Response:
+    """Streamed chat completion returning content, then finish_reason."""
+    chunks = [
+        {"index": 0, "delta": {"role": "assistant", "content": content}, "finish_reason": None},
+        {"index": 0, "delta": {}, "finish_reason": finish_reason},
+    ]
+    events = [
+        {"id": "c", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o", "choices": [chunk]}
+        for chunk in chunks
+    ]
+    body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+    return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=body.encode())
+
+
+def _dropped_sse_response(content: str) -> httpx.Response:
+    """Streamed chat completion whose connection drops after content."""
+    event = {
+        "id": "c",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "gpt-4o",
+        "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}],
+    }
+
+    async def body():
+        yield f"data: {json.dumps(event)}\n\n".encode()
+        raise httpx.ReadError("connection dropped")
+
+    return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=body())
+
+
+class ContextBudgetTest(unittest.TestCase):
+    """One oversized submission does not crowd out the shared context."""
+
+    def test_oversized_submission_is_trimmed_instead_of_the_grid(self):
+        submissions = {"Alice": "a" * 2_000_000, "Bob": "Travail de Bob"}
+
+        evaluation_grid, knowledge_base = fit_context_to_budget(
+            model="gpt-4o",
+            system_prompt="Tu es un correcteur.",
+            evaluation_grid="Clarté /5",
+            knowledge_base="Cours",
+            custom_instructions="",
+            student_works=list(submissions.values()),
+        )
+        fitted = fit_submissions_to_budget("gpt-4o", submissions)
+
+        self.assertEqual((evaluation_grid, knowledge_base), ("Clarté /5", "Cours"))
+        self.assertLess(len(fitted["Alice"]), len(submissions["Alice"]))
+        self.assertEqual(fitted["Bob"], submissions["Bob"])
+
+
+class BatchFallbackTest(unittest.IsolatedAsyncioTestCase):
+    """Grouped requests that fail are retried one student at a time."""
+
+    async def test_truncated_group_falls_back_to_single_requests(self):
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            body = json.loads(request.content)
+            schema = body["response_format"]["json_schema"]["name"]
+            requests.append(schema)
+            if schema == "BatchEvaluationModel":
+                # Grouped response cut at the output token limit
+                return _sse_response('{"evaluations": [{"student_name": "Al', "length")
+            return _sse_response(json.dumps(EVALUATION), "stop")
+
+        client = AsyncOpenAI(
+            api_key="test",
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            max_retries=0,
+        )
+        async with client:
+            results = dict([
+                pair
+                async for pair in evaluate_all_students_stream(
+                    client=client,
+                    student_submissions={"Alice": "Travail d'Alice", "Bob": "Travail de Bob"},
+                    evaluation_grid="Clarté /5",
+                    knowledge_base="",
+                    system_prompt="Tu es un correcteur.",
+                    batch_size=2,
+                )
+            ])
+
+        self.assertEqual(requests, ["BatchEvaluationModel", "EvaluationModel", "EvaluationModel"])
+        self.assertEqual(set(results), {"Alice", "Bob"})
+        for student_name, result in results.items():
+            self.assertIsInstance(result, EvaluationResult)
+            self.assertEqual(result.student_name, student_name)
+            self.assertEqual(result.note_finale, 4)
+            # Whole grades stay int, so exports show "4 / 5" rather than "4.0 / 5.0"
+            self.assertIsInstance(result.note_finale, int)
+
+
+
+class RetryTest(unittest.IsolatedAsyncioTestCase):
+    """Transient failures are retried through the rate limiter, with a fresh preview."""
+
+    async def test_dropped_stream_is_retried(self):
+        responses = [_dropped_sse_response("Début"), _sse_response("Évaluation complète", "stop")]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return responses.pop(0)
+
+        deltas = []
+        acquire = mock.AsyncMock()
+        client = AsyncOpenAI(
+            api_key="test",
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            max_retries=0,
+        )
+        with (
+            mock.patch.dict(llm_evaluator.RETRY_TRANSIENT_ERRORS, wait=wait_none()),
+            mock.patch.object(llm_evaluator.RateLimiter, "acquire", acquire),
+        ):
+            async with client:
+                results = dict([
+                    pair
+                    async for pair in evaluate_all_students_free_format_stream(
+                        client=client,
+                        student_submissions={"Alice": "Travail d'Alice"},
+                        evaluation_grid="Clarté /5",
+                        knowledge_base="",
+                        system_prompt="Tu es un correcteur.",
+                        output_format_instructions="Markdown",
+                        token_callback=lambda name, delta: deltas.append(delta),
+                    )
+                ])
+
+        self.assertEqual(results, {"Alice": "Évaluation complète"})
+        # Each attempt takes rate budget, and the preview is reset before the retry
+        self.assertEqual(acquire.await_count, 2)
+        self.assertEqual(deltas, ["Début", None, "Évaluation complète"])
+
+
+if __name__ == "__main__":
+    unittest.main()